@@ -0,0 +1,293 @@
+import argparse
+import dataclasses
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+from caro import game as game_module
+from caro import render
+from caro.config import CaroConfig
+from caro.core import PLAYER_X, PLAYER_O
+from caro.game import CaroGame
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+BenchPlayer = namedtuple("BenchPlayer", "id bot mention display_name")
+
+PLAYER_ONE = BenchPlayer(1, False, "<@1>", "bench-x")
+PLAYER_TWO = BenchPlayer(2, True, "<@2>", "bench-o")
+
+# (history_x, history_o, side to move) as cell indices, replayed oldest first.
+POSITIONS = {
+    3: [
+        ((), (4,), PLAYER_X),
+        ((0,), (4,), PLAYER_X),
+        ((0, 8), (4,), PLAYER_O),
+        ((0, 8, 2), (4, 1), PLAYER_O),
+        ((4, 2, 6), (0, 8, 1), PLAYER_X),
+        ((1, 3, 5), (0, 4, 7), PLAYER_X),
+    ],
+    4: [
+        ((5,), (), PLAYER_O),
+        ((5, 10), (0,), PLAYER_O),
+        ((5, 10, 6), (0, 15, 9), PLAYER_X),
+        ((1, 6, 11), (4, 9, 14), PLAYER_X),
+    ],
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def position_game(config, history_x, history_o, turn, advanced=False):
+    game = CaroGame(PLAYER_ONE, PLAYER_TWO, is_pvp=False, config=config, advanced=advanced)
+    for cell in history_x:
+        game.board.place(cell, PLAYER_X)
+    for cell in history_o:
+        game.board.place(cell, PLAYER_O)
+    game.current_turn = turn
+    return game
+
+
+def run_selfplay(config, games, max_plies, seed, advanced=False):
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(games):
+        game = CaroGame(PLAYER_ONE, PLAYER_TWO, is_pvp=False, config=config, advanced=advanced)
+        game.place(*divmod(rng.choice(game.board.empty_cells()), game.board.size))
+        for _ in range(max_plies):
+            if game.finished:
+                break
+            result = game.search()
+            samples.append(result)
+            if result.move is None:
+                break
+            game.place(*result.move)
+    return samples
+
+
+def run_positions(config, repeat):
+    samples = []
+    for history_x, history_o, turn in POSITIONS.get(config.board_size, ()):
+        if len(history_x) > config.max_pieces or len(history_o) > config.max_pieces:
+            continue
+        for _ in range(repeat):
+            samples.append(position_game(config, history_x, history_o, turn).search())
+    return samples
+
+
+def run_render(config, moves, seed):
+    if not render.available():
+        return []
+    try:
+        import asyncio
+        import discord
+    except ImportError:
+        discord = None
+    rows = []
+    for size, advanced in ((config.board_size, False), (config.advan_board_size, True)):
+        rng = random.Random(seed)
+        game_config = dataclasses.replace(config, max_pieces=size * size) if not advanced else config
+        game = CaroGame(PLAYER_ONE, PLAYER_TWO, is_pvp=True, config=game_config, advanced=advanced)
+        renderer = render.BoardRenderer(config.render_cell_px)
+        image_ms = []
+        image_bytes = []
+        boards = []
+        for _ in range(moves):
+            if game.finished:
+                break
+            game.place(*divmod(rng.choice(game.board.empty_cells()), game.board.size))
+            start = time.perf_counter()
+            png = renderer.render("bench", game.board, {game.last_move})
+            image_ms.append((time.perf_counter() - start) * 1000)
+            image_bytes.append(len(png))
+            boards.append(game.board.copy())
+        button_ms = []
+        button_bytes = []
+        if discord is not None and size <= 5:
+            button_ms, button_bytes = asyncio.run(_button_payloads(boards))
+        for path, ms, sizes in (("image", image_ms, image_bytes), ("buttons", button_ms, button_bytes)):
+            if not ms:
+                continue
+            rows.append({
+                "suite": "render",
+                "path": path,
+                "board_size": size,
+                "moves": len(ms),
+                "p50_ms": round(percentile(ms, 50), 3),
+                "p95_ms": round(percentile(ms, 95), 3),
+                "avg_bytes": round(sum(sizes) / len(sizes)),
+            })
+    return rows
+
+
+async def _button_payloads(boards):
+    import discord
+
+    times = []
+    sizes = []
+    for board in boards:
+        start = time.perf_counter()
+        view = discord.ui.View()
+        for r in range(board.size):
+            for c in range(board.size):
+                val = board.get(r, c)
+                view.add_item(discord.ui.Button(
+                    label="❌" if val == PLAYER_X else "⭕" if val == PLAYER_O else "⠀",
+                    disabled=val != 0,
+                    row=r,
+                    custom_id=f"caro_bench_{r}_{c}",
+                ))
+        payload = json.dumps(view.to_components()).encode()
+        times.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(payload))
+    return times, sizes
+
+
+def summarise(suite, config, samples, peak, advanced=False):
+    elapsed = sum(r.elapsed for r in samples)
+    nodes = sum(r.nodes for r in samples)
+    latencies = [r.elapsed * 1000 for r in samples]
+    return {
+        "suite": suite,
+        "mode": "gomoku" if advanced else "rolling",
+        "engine": config.advan_engine if advanced else config.engine,
+        "board_size": config.advan_board_size if advanced else config.board_size,
+        "max_pieces": None if advanced else config.max_pieces,
+        "max_depth": config.minimax_depth,
+        "budget_ms": config.advan_move_budget * 1000 if advanced else config.minimax_budget_ms,
+        "moves": len(samples),
+        "nodes": nodes,
+        "nodes_per_sec": round(nodes / elapsed) if elapsed else 0,
+        "avg_depth": round(sum(r.depth for r in samples) / len(samples), 2) if samples else 0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "peak_kb": round(peak / 1024, 1) if peak is not None else None,
+    }
+
+
+def measure(fn, trace_memory):
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        samples = fn()
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return samples, peak
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Caro engine benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 4])
+    parser.add_argument("--pieces", type=int, nargs="+", default=[3])
+    parser.add_argument("--depths", type=int, nargs="+", default=[6, 12])
+    parser.add_argument("--budget-ms", type=int, default=500)
+    parser.add_argument("--games", type=int, default=5)
+    parser.add_argument("--max-plies", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--gomoku", action="store_true", help="also self-play the advanced board")
+    parser.add_argument("--render", action="store_true", help="compare image and button board payloads")
+    parser.add_argument("--table", action="store_true", help="answer from the solution table when it applies")
+    parser.add_argument("--trace-memory", action="store_true", help="report tracemalloc peak per case (slow)")
+    parser.add_argument("--engine", choices=("minimax", "mcts"), default="minimax",
+                        help="search engine for both board modes")
+    parser.add_argument("--tt-entries", type=int, default=CaroConfig.tt_max_entries,
+                        help="transposition table size (0 disables it)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="write machine-readable results to PATH ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    base = CaroConfig(bot_mistake_enabled=False, minimax_budget_ms=args.budget_ms, tt_max_entries=args.tt_entries,
+                      engine=args.engine, advan_engine=args.engine)
+    results = []
+    for size in args.sizes:
+        for pieces in args.pieces:
+            for depth in args.depths:
+                config = dataclasses.replace(base, board_size=size, max_pieces=pieces, minimax_depth=depth)
+                if args.table:
+                    game_module.load_solution_table(config, "caro_table.bin")
+                samples, peak = measure(
+                    lambda: run_selfplay(config, args.games, args.max_plies, args.seed), args.trace_memory
+                )
+                results.append(summarise("selfplay", config, samples, peak))
+                samples, peak = measure(lambda: run_positions(config, args.repeat), args.trace_memory)
+                if samples:
+                    results.append(summarise("positions", config, samples, peak))
+    if args.gomoku:
+        config = dataclasses.replace(base, advan_move_budget=args.budget_ms / 1000)
+        samples, peak = measure(
+            lambda: run_selfplay(config, args.games, args.max_plies, args.seed, advanced=True), args.trace_memory
+        )
+        results.append(summarise("selfplay", config, samples, peak, advanced=True))
+
+    if args.render:
+        render_rows = run_render(base, args.max_plies, args.seed)
+        if not render_rows:
+            print("render suite skipped: Pillow is not installed")
+    else:
+        render_rows = []
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": vars(args),
+        "peak_rss_kb": peak_rss_kb(),
+        "results": results,
+        "transpositions": game_module.transposition_stats(),
+        "render": render_rows,
+    }
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return report
+
+    columns = ("suite", "mode", "engine", "board_size", "max_pieces", "max_depth", "moves",
+               "nodes_per_sec", "avg_depth", "p50_ms", "p95_ms", "p99_ms", "peak_kb")
+    print(" ".join(f"{c:>13}" for c in columns))
+    for row in results:
+        print(" ".join(f"{str(row[c]):>13}" for c in columns))
+    if render_rows:
+        columns = ("suite", "path", "board_size", "moves", "p50_ms", "p95_ms", "avg_bytes")
+        print()
+        print(" ".join(f"{c:>13}" for c in columns))
+        for row in render_rows:
+            print(" ".join(f"{str(row[c]):>13}" for c in columns))
+    tt = report["transpositions"]
+    if tt:
+        print(f"transposition table: {tt['entries']} entries, hit rate {tt['hit_rate']:.1%}, {tt['cutoffs']} cutoffs")
+    print(f"peak RSS: {report['peak_rss_kb']} KB")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import asyncio
+import time
+from collections import deque
+
+import discord
+
+CATEGORY_NAME = "Tic-Tac-Toe"
+IDLE_NAME = "caro-idle"
+POOL_MARKER = "caro-pool"
+POOL_TOPIC = f"Phòng đấu Caro [{POOL_MARKER}]"
+RENAME_LIMIT = 2
+RENAME_WINDOW = 600
+
+
+class ChannelPool:
+    def __init__(self, depth, category_id=None):
+        self.depth = depth
+        self.category_id = category_id
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+        self.deleted = 0
+        self.renamed = 0
+        self._idle = {}
+        self._missing = {}
+        self._renames = {}
+        self._refills = {}
+        self._categories = {}
+
+    def idle_count(self, guild_id=None):
+        if guild_id is not None:
+            return len(self._idle.get(guild_id, ()))
+        return sum(len(channels) for channels in self._idle.values())
+
+    def find_category(self, guild):
+        category = self._categories.get(guild.id)
+        if category is not None and guild.get_channel(category.id) is not None:
+            return category
+        category = None
+        if self.category_id:
+            category = guild.get_channel(int(self.category_id))
+        if not isinstance(category, discord.CategoryChannel):
+            category = discord.utils.get(guild.categories, name=CATEGORY_NAME)
+        if category is not None:
+            self._categories[guild.id] = category
+        return category
+
+    async def category(self, guild):
+        category = self.find_category(guild)
+        if category is None:
+            category = await guild.create_category(CATEGORY_NAME)
+            self._categories[guild.id] = category
+        return category
+
+    def hidden_overwrites(self, guild):
+        return {
+            guild.default_role: discord.PermissionOverwrite(view_channel=False),
+            guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True),
+        }
+
+    def game_overwrites(self, guild, players):
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(view_channel=True, send_messages=False),
+            guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True),
+        }
+        for player in players:
+            overwrites[player] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
+        return overwrites
+
+    @staticmethod
+    def is_pool_channel(channel):
+        return POOL_MARKER in (getattr(channel, "topic", None) or "") or channel.name == IDLE_NAME
+
+    @staticmethod
+    def is_hidden(channel, guild):
+        return channel.overwrites_for(guild.default_role).view_channel is False
+
+    def can_rename(self, channel):
+        now = time.monotonic()
+        recent = [t for t in self._renames.get(channel.id, ()) if now - t < RENAME_WINDOW]
+        self._renames[channel.id] = recent
+        return len(recent) < RENAME_LIMIT
+
+    def adopt(self, guild):
+        category = self.find_category(guild)
+        if category is None or self.depth <= 0:
+            return 0
+        idle = self._idle.setdefault(guild.id, deque())
+        known = {channel.id for channel in idle}
+        adopted = 0
+        for channel in category.text_channels:
+            if len(idle) >= self.depth:
+                break
+            if channel.id not in known and self.is_pool_channel(channel) and self.is_hidden(channel, guild):
+                idle.append(channel)
+                adopted += 1
+        return adopted
+
+    async def acquire(self, guild, name, players):
+        idle = self._idle.get(guild.id)
+        channel = None
+        while idle and channel is None:
+            candidate = idle.popleft()
+            if guild.get_channel(candidate.id) is not None:
+                channel = candidate
+            else:
+                self.lost(guild)
+        overwrites = self.game_overwrites(guild, players)
+        if channel is not None:
+            # Discord allows two renames per channel every ten minutes; past that the
+            # room keeps its previous name instead of blocking the game on a 429.
+            if channel.name != name and self.can_rename(channel):
+                self._renames[channel.id].append(time.monotonic())
+                self.renamed += 1
+                await channel.edit(name=name, overwrites=overwrites)
+            else:
+                await channel.edit(overwrites=overwrites)
+            self.reused += 1
+        else:
+            category = await self.category(guild)
+            channel = await category.create_text_channel(name, overwrites=overwrites, topic=POOL_TOPIC)
+            self.created += 1
+        return channel
+
+    async def release(self, channel):
+        guild = getattr(channel, "guild", None)
+        if channel is None or guild is None:
+            return
+        idle = self._idle.setdefault(guild.id, deque())
+        try:
+            if len(idle) >= self.depth or not hasattr(channel, "purge"):
+                self._renames.pop(channel.id, None)
+                await channel.delete()
+                self.deleted += 1
+                return
+            try:
+                await channel.purge(limit=None)
+                await channel.edit(overwrites=self.hidden_overwrites(guild))
+            except discord.NotFound:
+                raise
+            except discord.HTTPException as e:
+                # Purging also needs Manage Messages and Read Message History; without
+                # them fall back to deleting the room rather than leaving it visible.
+                print(f"Channel pool recycle error in {guild.id}: {e}")
+                self._renames.pop(channel.id, None)
+                await channel.delete()
+                self.deleted += 1
+                return
+        except discord.NotFound:
+            self._renames.pop(channel.id, None)
+            self.lost(guild)
+            return
+        idle.append(channel)
+        self.recycled += 1
+
+    def lost(self, guild):
+        self._missing[guild.id] = self._missing.get(guild.id, 0) + 1
+        self.schedule_refill(guild)
+
+    def schedule_refill(self, guild):
+        task = self._refills.get(guild.id)
+        if self.depth <= 0 or (task is not None and not task.done()):
+            return
+        self._refills[guild.id] = asyncio.create_task(self._refill(guild))
+
+    async def _refill(self, guild):
+        idle = self._idle.setdefault(guild.id, deque())
+        try:
+            self.adopt(guild)
+            category = await self.category(guild)
+            while self._missing.get(guild.id) and len(idle) < self.depth:
+                channel = await category.create_text_channel(
+                    IDLE_NAME, overwrites=self.hidden_overwrites(guild), topic=POOL_TOPIC
+                )
+                self.created += 1
+                self._missing[guild.id] -= 1
+                idle.append(channel)
+            self._missing.pop(guild.id, None)
+        except discord.HTTPException as e:
+            print(f"Channel pool refill error in {guild.id}: {e}")
+
+    def warm(self, guilds):
+        adopted = sum(self.adopt(guild) for guild in guilds)
+        if adopted:
+            print(f"Channel pool adopted {adopted} idle channels")
+
+    def shutdown(self):
+        for task in self._refills.values():
+            task.cancel()
+        self._refills.clear()
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass, fields
+
+
+class ConfigError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class CaroConfig:
+    board_size: int = 3
+    advan_board_size: int = 10
+    advan_win_length: int = 5
+    advan_move_budget: float = 0.8
+    max_pieces: int = 3
+    minimax_depth: int = 12
+    minimax_budget_ms: int = 500
+    tt_max_entries: int = 100000
+    engine: str = "minimax"
+    advan_engine: str = "minimax"
+    mcts_workers: int = 0
+    mcts_exploration: float = 1.4
+    mcts_rollout_plies: int = 40
+    engine_executor: str = "process"
+    engine_workers: int = 2
+    engine_timeout: float = 5
+    ponder_enabled: bool = True
+    ponder_budget: float = 10
+    ponder_max_moves: int = 12
+    bot_goes_first: object = "random"
+    bot_mistake_enabled: bool = False
+    bot_mistake_chance: int = 30
+    category_id: int = 0
+    game_timeout: float = 300
+    challenge_timeout: float = 60
+    channel_delete_delay: float = 10
+    channel_pool_size: int = 2
+    bot_move_delay: float = 1.5
+    channel_reset_delay: float = 5
+    edit_rate_limit: int = 5
+    edit_rate_period: float = 5.0
+    config_reload_interval: float = 2
+    game_ttl: float = 900
+    registry_max_games: int = 5000
+    registry_sweep_interval: float = 60
+    store_path: str = "caro_games.sqlite3"
+    store_flush_interval: float = 1.0
+    match_log_dir: str = "match_logs"
+    match_log_flush_interval: float = 1.0
+    match_stats_path: str = "caro_stats.sqlite3"
+    stats_ingest_interval: float = 30
+    leaderboard_cache_ttl: float = 60
+    leaderboard_size: int = 10
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 9464
+    loop_lag_interval: float = 0.5
+    ipc_dir: str = "/tmp/caro-ipc"
+    board_renderer: str = "auto"
+    render_cell_px: int = 40
+    emoji_x: str = "❌"
+    emoji_o: str = "⭕"
+    emoji_empty: str = "⬜"
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            raise ConfigError("Config root must be an object")
+        values = {}
+        for f in fields(cls):
+            if f.name in data:
+                values[f.name] = _coerce(f.name, f.type, data[f.name])
+        unknown = sorted(set(data) - set(values))
+        if unknown:
+            print(f"Ignoring unknown config keys: {', '.join(unknown)}")
+        config = cls(**values)
+        config.validate()
+        return config
+
+    def validate(self):
+        if self.board_size < 3:
+            raise ConfigError("board_size must be at least 3")
+        if self.max_pieces < 1:
+            raise ConfigError("max_pieces must be at least 1")
+        if not 5 <= self.advan_board_size <= 10:
+            raise ConfigError("advan_board_size must be between 5 and 10")
+        if not 3 <= self.advan_win_length <= self.advan_board_size:
+            raise ConfigError("advan_win_length must be between 3 and advan_board_size")
+        if self.advan_move_budget <= 0:
+            raise ConfigError("advan_move_budget must be positive")
+        if self.minimax_depth < 1:
+            raise ConfigError("minimax_depth must be at least 1")
+        if self.minimax_budget_ms <= 0:
+            raise ConfigError("minimax_budget_ms must be positive")
+        for key in ("engine", "advan_engine"):
+            if getattr(self, key) not in ("minimax", "mcts"):
+                raise ConfigError(f"Unknown {key}: {getattr(self, key)}")
+        if self.mcts_workers < 0 or self.mcts_exploration <= 0 or self.mcts_rollout_plies < 1:
+            raise ConfigError("mcts_workers, mcts_exploration and mcts_rollout_plies are out of range")
+        if self.tt_max_entries < 0:
+            raise ConfigError("tt_max_entries must not be negative")
+        if self.engine_executor not in ("process", "thread", "inline"):
+            raise ConfigError(f"Unknown engine_executor: {self.engine_executor}")
+        if self.edit_rate_limit < 1 or self.edit_rate_period <= 0:
+            raise ConfigError("edit_rate_limit and edit_rate_period must be positive")
+        if not 0 <= self.metrics_port <= 65535:
+            raise ConfigError("metrics_port must be between 0 and 65535")
+        if self.loop_lag_interval <= 0:
+            raise ConfigError("loop_lag_interval must be positive")
+        if self.channel_pool_size < 0:
+            raise ConfigError("channel_pool_size must not be negative")
+        if self.game_ttl <= 0 or self.registry_sweep_interval <= 0:
+            raise ConfigError("game_ttl and registry_sweep_interval must be positive")
+        if self.registry_max_games < 1:
+            raise ConfigError("registry_max_games must be at least 1")
+        if self.config_reload_interval <= 0:
+            raise ConfigError("config_reload_interval must be positive")
+        if self.store_flush_interval <= 0:
+            raise ConfigError("store_flush_interval must be positive")
+        if self.match_log_flush_interval <= 0 or self.stats_ingest_interval <= 0:
+            raise ConfigError("match_log_flush_interval and stats_ingest_interval must be positive")
+        if self.leaderboard_cache_ttl < 0 or not 1 <= self.leaderboard_size <= 25:
+            raise ConfigError("leaderboard_cache_ttl must not be negative and leaderboard_size must be 1-25")
+        if self.board_renderer not in ("auto", "image", "text"):
+            raise ConfigError(f"Unknown board_renderer: {self.board_renderer}")
+        if not 16 <= self.render_cell_px <= 128:
+            raise ConfigError("render_cell_px must be between 16 and 128")
+        if self.ponder_budget < 0 or self.ponder_max_moves < 0:
+            raise ConfigError("ponder_budget and ponder_max_moves must not be negative")
+        if not 0 <= self.bot_mistake_chance <= 100:
+            raise ConfigError("bot_mistake_chance must be between 0 and 100")
+        if self.bot_goes_first != "random" and not isinstance(self.bot_goes_first, bool):
+            raise ConfigError("bot_goes_first must be true, false or \"random\"")
+
+
+def _coerce(key, kind, value):
+    if kind is object:
+        return value
+    if kind is float and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if kind is int and isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if kind in (bool, str) and isinstance(value, kind):
+        return value
+    raise ConfigError(f"{key} must be {kind.__name__}, got {type(value).__name__}")
+
+
+class ConfigStore:
+    def __init__(self, path):
+        self.path = path
+        self.snapshot = CaroConfig()
+        self._mtime = None
+        self.reload()
+
+    def reload(self):
+        try:
+            mt = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mt == self._mtime:
+            return False
+        self._mtime = mt
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.snapshot = CaroConfig.from_dict(data)
+        return True
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.snapshot.config_reload_interval)
+            try:
+                if self.reload():
+                    print("Reloaded caro config.")
+            except (OSError, ValueError) as e:
+                print(f"Config reload error: {e}")
@@ -0,0 +1,220 @@
+import random
+from collections import namedtuple
+from functools import lru_cache
+
+EMPTY = 0
+PLAYER_X = 1
+PLAYER_O = 2
+
+SearchResult = namedtuple("SearchResult", "move score depth nodes elapsed tt_hits tt_probes", defaults=(0, 0))
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def other(player):
+    return PLAYER_O if player == PLAYER_X else PLAYER_X
+
+
+@lru_cache(maxsize=None)
+def line_masks(size, win_length):
+    lines = []
+    for r in range(size):
+        for c in range(size):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_r = r + dr * (win_length - 1)
+                end_c = c + dc * (win_length - 1)
+                if not (0 <= end_r < size and 0 <= end_c < size):
+                    continue
+                mask = 0
+                for k in range(win_length):
+                    mask |= 1 << ((r + dr * k) * size + c + dc * k)
+                lines.append(mask)
+    return tuple(lines)
+
+
+@lru_cache(maxsize=None)
+def cell_line_index(size, win_length):
+    lines = line_masks(size, win_length)
+    return tuple(
+        tuple(i for i, line in enumerate(lines) if (line >> cell) & 1)
+        for cell in range(size * size)
+    )
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(size, max_pieces, win_length):
+    rng = random.Random(f"caro:{size}:{max_pieces}:{win_length}")
+    cells = size * size
+    # Piece order only matters when the oldest piece can be evicted.
+    ages = max_pieces if max_pieces < cells else 1
+    turns = (0, rng.getrandbits(64), rng.getrandbits(64))
+    pieces = tuple(
+        tuple(tuple(rng.getrandbits(64) for _ in range(cells)) for _ in range(ages))
+        for _ in (PLAYER_X, PLAYER_O)
+    )
+    return (turns,) + pieces
+
+
+class Board:
+    __slots__ = (
+        "size", "win_length", "max_pieces", "lines", "cell_lines", "weights", "full",
+        "bits", "rings", "heads", "counts", "line_counts", "complete", "balance",
+        "zobrist", "ordered", "hashes",
+    )
+
+    def __init__(self, size, max_pieces, win_length=None, weights=None):
+        self.size = size
+        self.win_length = win_length or size
+        self.max_pieces = max_pieces
+        self.lines = line_masks(size, self.win_length)
+        self.cell_lines = cell_line_index(size, self.win_length)
+        self.weights = weights or tuple(range(self.win_length + 1))
+        self.full = (1 << (size * size)) - 1
+        self.bits = [0, 0, 0]
+        self.rings = [None, [-1] * max_pieces, [-1] * max_pieces]
+        self.heads = [0, 0, 0]
+        self.counts = [0, 0, 0]
+        self.line_counts = [None, [0] * len(self.lines), [0] * len(self.lines)]
+        self.complete = [0, 0, 0]
+        self.balance = 0
+        self.zobrist = zobrist_keys(size, max_pieces, self.win_length)
+        self.ordered = max_pieces < size * size
+        self.hashes = [0, 0, 0]
+
+    def copy(self):
+        board = Board.__new__(Board)
+        board.size = self.size
+        board.win_length = self.win_length
+        board.max_pieces = self.max_pieces
+        board.lines = self.lines
+        board.cell_lines = self.cell_lines
+        board.weights = self.weights
+        board.full = self.full
+        board.bits = list(self.bits)
+        board.rings = [None, list(self.rings[PLAYER_X]), list(self.rings[PLAYER_O])]
+        board.heads = list(self.heads)
+        board.counts = list(self.counts)
+        board.line_counts = [None, list(self.line_counts[PLAYER_X]), list(self.line_counts[PLAYER_O])]
+        board.complete = list(self.complete)
+        board.balance = self.balance
+        board.zobrist = self.zobrist
+        board.ordered = self.ordered
+        board.hashes = list(self.hashes)
+        return board
+
+    def get(self, row, col):
+        bit = 1 << (row * self.size + col)
+        if self.bits[PLAYER_X] & bit:
+            return PLAYER_X
+        if self.bits[PLAYER_O] & bit:
+            return PLAYER_O
+        return EMPTY
+
+    def is_empty(self, cell):
+        return not ((self.bits[PLAYER_X] | self.bits[PLAYER_O]) >> cell) & 1
+
+    def empty_mask(self):
+        return self.full & ~(self.bits[PLAYER_X] | self.bits[PLAYER_O])
+
+    def empty_cells(self):
+        mask = self.empty_mask()
+        cells = []
+        while mask:
+            low = mask & -mask
+            cells.append(low.bit_length() - 1)
+            mask ^= low
+        return cells
+
+    def history(self, player):
+        ring = self.rings[player]
+        head = self.heads[player]
+        mp = self.max_pieces
+        return [ring[(head + i) % mp] for i in range(self.counts[player])]
+
+    def oldest(self, player):
+        if self.counts[player] < self.max_pieces:
+            return -1
+        return self.rings[player][self.heads[player]]
+
+    def _count(self, cell, player, delta):
+        if player == PLAYER_X:
+            own = self.line_counts[PLAYER_X]
+            opp = self.line_counts[PLAYER_O]
+            sign = 1
+        else:
+            own = self.line_counts[PLAYER_O]
+            opp = self.line_counts[PLAYER_X]
+            sign = -1
+        w = self.weights
+        win_length = self.win_length
+        for li in self.cell_lines[cell]:
+            n = own[li]
+            new = n + delta
+            own[li] = new
+            if new == win_length:
+                self.complete[player] += 1
+            elif n == win_length:
+                self.complete[player] -= 1
+            o = opp[li]
+            if o == 0:
+                self.balance += sign * (w[new] - w[n])
+            elif n == 0:
+                self.balance += sign * w[o]
+            elif new == 0:
+                self.balance -= sign * w[o]
+
+    def place(self, cell, player):
+        ring = self.rings[player]
+        if self.counts[player] == self.max_pieces:
+            head = self.heads[player]
+            evicted = ring[head]
+            ring[head] = cell
+            self.heads[player] = (head + 1) % self.max_pieces
+            self.bits[player] ^= (1 << evicted) | (1 << cell)
+            self._count(evicted, player, -1)
+            self._count(cell, player, 1)
+            self._rehash(player)
+            return evicted
+        count = self.counts[player]
+        ring[(self.heads[player] + count) % self.max_pieces] = cell
+        self.hashes[player] ^= self.zobrist[player][count if self.ordered else 0][cell]
+        self.counts[player] = count + 1
+        self.bits[player] |= 1 << cell
+        self._count(cell, player, 1)
+        return -1
+
+    def undo(self, player, cell, evicted):
+        self._count(cell, player, -1)
+        if evicted >= 0:
+            head = (self.heads[player] - 1) % self.max_pieces
+            self.rings[player][head] = evicted
+            self.heads[player] = head
+            self.bits[player] ^= (1 << evicted) | (1 << cell)
+            self._count(evicted, player, 1)
+            self._rehash(player)
+        else:
+            count = self.counts[player] - 1
+            self.counts[player] = count
+            self.bits[player] &= ~(1 << cell)
+            self.hashes[player] ^= self.zobrist[player][count if self.ordered else 0][cell]
+
+    def _rehash(self, player):
+        keys = self.zobrist[player]
+        ring = self.rings[player]
+        head = self.heads[player]
+        mp = self.max_pieces
+        value = 0
+        for age in range(self.counts[player]):
+            value ^= keys[age][ring[(head + age) % mp]]
+        self.hashes[player] = value
+
+    def hash_key(self, player):
+        return self.hashes[PLAYER_X] ^ self.hashes[PLAYER_O] ^ self.zobrist[0][player]
+
+    def has_line(self, player):
+        return self.complete[player] > 0
+
+    def score(self, player):
+        return self.balance if player == PLAYER_X else -self.balance
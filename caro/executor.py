@@ -0,0 +1,147 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+def _ready():
+    return True
+
+
+class EngineExecutor:
+    def __init__(self, mode="process", workers=None, initializer=None):
+        if mode not in ("process", "thread", "inline"):
+            raise ValueError(f"Unknown engine executor mode: {mode}")
+        self.mode = mode
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.initializer = initializer
+        self._pool = None
+        self._slots = asyncio.Semaphore(self.workers)
+        self._tasks = {}
+        self._cancelled = set()
+
+    def _ensure_pool(self):
+        if self._pool is None:
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="caro-engine",
+                    initializer=self.initializer,
+                )
+        return self._pool
+
+    def _reset_pool(self, pool):
+        if self._pool is pool:
+            self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _done(self, pool, future):
+        self._slots.release()
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._reset_pool(pool)
+
+    async def _start(self, fn, args):
+        # Hold a worker slot until the job really finishes, so callers' timeouts
+        # only measure running time, not time spent queued behind other searches.
+        await self._slots.acquire()
+        try:
+            pool = self._ensure_pool()
+            try:
+                future = pool.submit(fn, *args)
+            except BrokenProcessPool:
+                self._reset_pool(pool)
+                pool = self._ensure_pool()
+                future = pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        loop = asyncio.get_running_loop()
+
+        def done(f):
+            try:
+                loop.call_soon_threadsafe(self._done, pool, f)
+            except RuntimeError:
+                pass
+
+        future.add_done_callback(done)
+        return asyncio.wrap_future(future)
+
+    async def _call(self, fn, args, timeout):
+        future = await self._start(fn, args)
+        return await asyncio.wait_for(future, timeout)
+
+    async def _call_many(self, fn, calls, timeout):
+        futures = []
+        try:
+            for args in calls:
+                futures.append(await self._start(fn, args))
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        return await asyncio.wait_for(asyncio.gather(*futures), timeout)
+
+    async def warm(self):
+        if self.mode == "inline":
+            return
+        loop = asyncio.get_running_loop()
+        pool = self._ensure_pool()
+        await asyncio.gather(*(loop.run_in_executor(pool, _ready) for _ in range(self.workers)))
+
+    async def run(self, key, fn, *args, timeout=None):
+        if self.mode == "inline":
+            return fn(*args)
+        self.cancel(key)
+        task = asyncio.ensure_future(self._call(fn, args, timeout))
+        self._tasks[key] = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if task in self._cancelled:
+                raise SearchCancelled(key) from None
+            raise
+        finally:
+            self._cancelled.discard(task)
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+
+    async def run_many(self, key, fn, calls, timeout=None):
+        if self.mode == "inline":
+            return [fn(*args) for args in calls]
+        self.cancel(key)
+        task = asyncio.ensure_future(self._call_many(fn, calls, timeout))
+        self._tasks[key] = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if task in self._cancelled:
+                raise SearchCancelled(key) from None
+            raise
+        finally:
+            self._cancelled.discard(task)
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+
+    def cancel(self, key):
+        task = self._tasks.pop(key, None)
+        if task is None or task.done():
+            return False
+        self._cancelled.add(task)
+        task.cancel()
+        return True
+
+    def pending(self):
+        return len(self._tasks)
+
+    def shutdown(self):
+        for key in list(self._tasks):
+            self.cancel(key)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
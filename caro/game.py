@@ -0,0 +1,380 @@
+import random
+import threading
+import time
+
+from caro import gomoku, mcts
+from caro.config import CaroConfig
+from caro.core import PLAYER_X, PLAYER_O, Board, SearchResult, SearchTimeout
+from caro.solver import SolutionTable
+from caro.transposition import EXACT, LOWER, UPPER, TranspositionTable, score_from_table, score_to_table
+
+WIN_SCORE = 1000
+
+_solution_table = None
+# One table per engine thread: entries and generations are not shared between concurrent searches.
+_transpositions = threading.local()
+_tables = []
+_tables_lock = threading.Lock()
+
+
+def load_solution_table(config, path):
+    global _solution_table
+    size = config.board_size
+    mp = config.max_pieces
+    if size != 3:
+        return None
+    if _solution_table is None or not _solution_table.matches(size, mp):
+        _solution_table = SolutionTable.load_or_build(path, size, mp)
+    return _solution_table
+
+
+def warm_caches(config, path):
+    load_solution_table(config, path)
+    CaroGame(None, None, config=config)
+    board = CaroGame(None, None, config=config, advanced=True).board
+    gomoku.geometry(board.size, board.win_length)
+    transposition_table(config)
+
+
+def transposition_table(config):
+    if config.tt_max_entries <= 0:
+        return None
+    table = getattr(_transpositions, "table", None)
+    if table is None or table.max_entries != config.tt_max_entries:
+        with _tables_lock:
+            if table is not None:
+                _tables.remove(table)
+            table = TranspositionTable(config.tt_max_entries)
+            _tables.append(table)
+        _transpositions.table = table
+    return table
+
+
+def transposition_stats():
+    with _tables_lock:
+        tables = list(_tables)
+    if not tables:
+        return {}
+    stats = [table.stats() for table in tables]
+    total = {key: sum(s[key] for s in stats) for key in stats[0] if key != "hit_rate"}
+    probes = total["hits"] + total["misses"]
+    total["hit_rate"] = total["hits"] / probes if probes else 0.0
+    total["tables"] = len(tables)
+    return total
+
+
+class CaroGame:
+    def __init__(self, player_x, player_o, is_pvp=True, config=None, advanced=False):
+        self.config = config or CaroConfig()
+        self.advanced = advanced
+        if advanced:
+            size = self.config.advan_board_size
+            self.board = Board(size, size * size, self.config.advan_win_length, gomoku.pattern_weights(self.config.advan_win_length))
+        else:
+            self.board = Board(self.config.board_size, self.config.max_pieces)
+        self.player_x = player_x
+        self.player_o = player_o
+        self.is_pvp = is_pvp
+        self.current_turn = PLAYER_X
+        self.finished = False
+        self.game_channel = None
+        self.announce_message = None
+        self.view = None
+        self.winner = None
+        self.last_search = None
+        self.last_move = None
+        self.last_evicted = -1
+        self.match_id = None
+        self.message_id = None
+        self.channel_id = None
+        self.guild_id = None
+        self.listener = None
+        self._deadline = None
+
+    @property
+    def history_x(self):
+        return self.get_history(PLAYER_X)
+
+    @property
+    def history_o(self):
+        return self.get_history(PLAYER_O)
+
+    def snapshot(self):
+        return {
+            "history_x": self.board.history(PLAYER_X),
+            "history_o": self.board.history(PLAYER_O),
+            "current_turn": self.current_turn,
+            "config": self.config,
+            "advanced": self.advanced,
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        game = cls(None, None, is_pvp=False, config=snapshot["config"], advanced=snapshot["advanced"])
+        for cell in snapshot["history_x"]:
+            game.board.place(cell, PLAYER_X)
+        for cell in snapshot["history_o"]:
+            game.board.place(cell, PLAYER_O)
+        game.current_turn = snapshot["current_turn"]
+        return game
+
+    def signature(self):
+        return (
+            tuple(self.board.history(PLAYER_X)),
+            tuple(self.board.history(PLAYER_O)),
+            self.current_turn,
+        )
+
+    def zobrist(self):
+        return self.board.hash_key(self.current_turn)
+
+    def engine_name(self):
+        return self.config.advan_engine if self.advanced else self.config.engine
+
+    def move_budget(self, budget=None):
+        config = self.config
+        limit = config.advan_move_budget if self.advanced else config.minimax_budget_ms / 1000
+        return min(budget, limit) if budget else limit
+
+    def mistake(self):
+        config = self.config
+        if config.bot_mistake_enabled and random.randint(1, 100) <= config.bot_mistake_chance:
+            empty_cells = self.board.empty_cells()
+            if empty_cells:
+                return SearchResult(divmod(random.choice(empty_cells), self.board.size), 0, 0, 0, 0.0)
+        return None
+
+    def fallback_move(self):
+        size = self.board.size
+        table = _solution_table
+        if not self.advanced and table and table.matches(size, self.config.max_pieces):
+            hit = table.probe(self.history_x, self.history_o, self.current_turn)
+            if hit and hit[2]:
+                return SearchResult(hit[2], hit[0], hit[1], 0, 0.0)
+        cells = self.reply_candidates()
+        return SearchResult(divmod(cells[0], size) if cells else None, 0, 0, 0, 0.0)
+
+    def reply_candidates(self):
+        if self.advanced:
+            engine = gomoku.GomokuEngine(self.board.copy(), self.current_turn)
+            return engine.candidates(self.current_turn, None)[0]
+        return self.board.empty_cells()
+
+    def current_player(self):
+        return self.player_x if self.current_turn == PLAYER_X else self.player_o
+
+    def get_history(self, player):
+        size = self.board.size
+        return [divmod(cell, size) for cell in self.board.history(player)]
+
+    def place(self, row, col):
+        cell = row * self.board.size + col
+        if not self.board.is_empty(cell):
+            return False
+        self.last_evicted = self.board.place(cell, self.current_turn)
+        self.last_move = cell
+        if self.check_win(self.current_turn):
+            self.finished = True
+            self.winner = self.current_turn
+        elif not self.board.empty_mask():
+            self.finished = True
+        else:
+            self.current_turn = PLAYER_O if self.current_turn == PLAYER_X else PLAYER_X
+        if self.listener:
+            self.listener(self)
+        return True
+
+    def check_win(self, player):
+        return self.board.has_line(player)
+
+    def ai_move(self, budget=None):
+        return self.search(budget).move
+
+    def search(self, budget=None):
+        table = transposition_table(self.config)
+        if table is None:
+            return self._search(budget)
+        hits, misses = table.hits, table.misses
+        result = self._search(budget)._replace(
+            tt_hits=table.hits - hits, tt_probes=table.hits + table.misses - hits - misses
+        )
+        self.last_search = result
+        return result
+
+    def _search(self, budget=None):
+        config = self.config
+        board = self.board
+        size = board.size
+        start = time.monotonic()
+        mistake = self.mistake()
+        if mistake:
+            self.last_search = mistake
+            return self.last_search
+
+        if self.engine_name() == "mcts":
+            stats = mcts.run(
+                board, self.current_turn, self.move_budget(budget),
+                config.mcts_exploration, config.mcts_rollout_plies
+            )
+            self.last_search = mcts.merge([stats], size)
+            return self.last_search
+
+        if self.advanced:
+            self.last_search = gomoku.search(
+                board, self.current_turn, self.move_budget(budget), transposition_table(config)
+            )
+            return self.last_search
+
+        player = self.current_turn
+        table = _solution_table
+        if table and table.matches(size, config.max_pieces):
+            hit = table.probe(self.history_x, self.history_o, player)
+            if hit and hit[2]:
+                self.last_search = SearchResult(hit[2], hit[0], hit[1], 0, time.monotonic() - start)
+                return self.last_search
+
+        self._deadline = start + self.move_budget(budget)
+        self._nodes = 0
+        self._killers = [[-1, -1] for _ in range(config.minimax_depth + 1)]
+        self._history_scores = [None, [0] * (size * size), [0] * (size * size)]
+        self._pv = [[] for _ in range(config.minimax_depth + 1)]
+        self._table = transposition_table(config)
+        if self._table is not None:
+            self._table.new_search()
+        best_pv = []
+        best_score = 0
+        depth_reached = 0
+        for depth in range(1, config.minimax_depth + 1):
+            self._prev_pv = best_pv
+            self._follow_pv = True
+            try:
+                score = self.negamax(player, depth, -WIN_SCORE - 1, WIN_SCORE + 1, 0)
+            except SearchTimeout:
+                break
+            if not self._pv[0]:
+                break
+            best_pv = list(self._pv[0])
+            best_score = score
+            depth_reached = depth
+            if abs(score) >= WIN_SCORE - config.minimax_depth:
+                break
+        self._deadline = None
+        if best_pv:
+            move = divmod(best_pv[0], size)
+        else:
+            empty_cells = board.empty_cells()
+            move = divmod(empty_cells[0], size) if empty_cells else None
+        self.last_search = SearchResult(move, best_score, depth_reached, self._nodes, time.monotonic() - start)
+        return self.last_search
+
+    def order_moves(self, player, ply, tt_move=-1):
+        board = self.board
+        killers = self._killers[ply]
+        history = self._history_scores[player]
+        pv_move = -1
+        if self._follow_pv and ply < len(self._prev_pv):
+            pv_move = self._prev_pv[ply]
+        scored = []
+        mask = board.empty_mask()
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            cell = low.bit_length() - 1
+            if cell == pv_move:
+                score = 1 << 40
+            elif cell == tt_move:
+                score = 1 << 35
+            elif cell == killers[0]:
+                score = 1 << 31
+            elif cell == killers[1]:
+                score = 1 << 30
+            else:
+                score = history[cell]
+            scored.append((score, cell))
+        scored.sort(reverse=True)
+        if pv_move < 0 or not scored or scored[0][1] != pv_move:
+            self._follow_pv = False
+        return [cell for _, cell in scored]
+
+    def negamax(self, player, depth, alpha, beta, ply):
+        self._nodes += 1
+        if not self._nodes & 127 and time.monotonic() > self._deadline:
+            raise SearchTimeout
+        self._pv[ply] = []
+        if depth <= 0:
+            return self.board.score(player)
+
+        board = self.board
+        table = self._table
+        tt_move = -1
+        if table is not None:
+            key = board.hash_key(player)
+            entry = table.probe(key)
+            if entry is not None:
+                tt_move = entry[3]
+                if ply and entry[0] >= depth:
+                    score = score_from_table(entry[2], ply, WIN_SCORE)
+                    flag = entry[1]
+                    if flag == EXACT or (flag == LOWER and score >= beta) or (flag == UPPER and score <= alpha):
+                        table.cutoffs += 1
+                        self._pv[ply] = [tt_move] if tt_move >= 0 else []
+                        return score
+        opponent = PLAYER_X if player == PLAYER_O else PLAYER_O
+        alpha_orig = alpha
+        best = -WIN_SCORE - 1
+        best_cell = -1
+        for cell in self.order_moves(player, ply, tt_move):
+            evicted = board.place(cell, player)
+            try:
+                if board.has_line(player):
+                    score = WIN_SCORE - ply - 1
+                    self._pv[ply + 1] = []
+                else:
+                    score = -self.negamax(opponent, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.undo(player, cell, evicted)
+            self._follow_pv = False
+            if score > best:
+                best = score
+                best_cell = cell
+                if score > alpha:
+                    alpha = score
+                    self._pv[ply] = [cell] + self._pv[ply + 1]
+                    if alpha >= beta:
+                        killers = self._killers[ply]
+                        if killers[0] != cell:
+                            killers[1] = killers[0]
+                            killers[0] = cell
+                        self._history_scores[player][cell] += depth * depth
+                        break
+        if table is not None and best_cell >= 0:
+            if best <= alpha_orig:
+                flag = UPPER
+            elif best >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            table.store(key, depth, flag, score_to_table(best, ply, WIN_SCORE), best_cell)
+        return best
+
+    def evaluate(self):
+        return self.board.score(PLAYER_O)
+
+
+def search_snapshot(snapshot, budget=None):
+    return CaroGame.from_snapshot(snapshot).search(budget)
+
+
+def mcts_snapshot(snapshot, budget, seed=None):
+    game = CaroGame.from_snapshot(snapshot)
+    config = game.config
+    return mcts.run(
+        game.board, game.current_turn, budget, config.mcts_exploration, config.mcts_rollout_plies, seed
+    )
+
+
+def ponder_snapshot(snapshot, cell, budget=None):
+    game = CaroGame.from_snapshot(snapshot)
+    if not game.place(*divmod(cell, game.board.size)) or game.finished:
+        return None
+    return game.signature(), game.search(budget)
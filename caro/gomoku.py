@@ -0,0 +1,245 @@
+import time
+from functools import lru_cache
+
+from caro.core import PLAYER_X, PLAYER_O, SearchResult, SearchTimeout, line_masks
+from caro.transposition import EXACT, LOWER, UPPER, score_from_table, score_to_table
+
+WIN_SCORE = 1000000
+PATTERN_WEIGHTS = (0, 1, 12, 150, 2000, 100000)
+BRANCH_LIMIT = 12
+MAX_DEPTH = 12
+NEAR_RADIUS = 2
+
+
+def _popcount(x):
+    return bin(x).count("1")
+
+
+class Geometry:
+    def __init__(self, size, win_length):
+        self.size = size
+        self.win_length = win_length
+        self.open_windows = []
+        for w in line_masks(size, win_length + 1):
+            ends = (w & -w) | (1 << (w.bit_length() - 1))
+            self.open_windows.append((w ^ ends, ends))
+        self.open_windows = tuple(self.open_windows)
+        self.near = []
+        for cell in range(size * size):
+            r, c = divmod(cell, size)
+            mask = 0
+            for nr in range(max(0, r - NEAR_RADIUS), min(size, r + NEAR_RADIUS + 1)):
+                for nc in range(max(0, c - NEAR_RADIUS), min(size, c + NEAR_RADIUS + 1)):
+                    mask |= 1 << (nr * size + nc)
+            self.near.append(mask)
+        self.near = tuple(self.near)
+        self.center = (size // 2) * size + size // 2
+
+
+@lru_cache(maxsize=None)
+def pattern_weights(win_length):
+    # Score a line by how many stones it still needs, so any win length reuses the five-in-a-row scale.
+    top = len(PATTERN_WEIGHTS) - 1
+    return (0,) + tuple(PATTERN_WEIGHTS[max(1, top - (win_length - n))] for n in range(1, win_length + 1))
+
+
+@lru_cache(maxsize=None)
+def geometry(size, win_length):
+    return Geometry(size, win_length)
+
+
+class GomokuEngine:
+    def __init__(self, board, player, table=None):
+        self.board = board
+        self.player = player
+        self.table = table
+        self.geo = geometry(board.size, board.win_length)
+        self.weights = board.weights
+        self.nodes = 0
+        self.deadline = None
+
+    def search(self, budget, max_depth=MAX_DEPTH):
+        start = time.monotonic()
+        self.deadline = start + budget
+        self.nodes = 0
+        if self.table is not None:
+            self.table.new_search()
+        moves, win = self.candidates(self.player, None)
+        if not moves:
+            return SearchResult(None, 0, 0, 0, 0.0)
+        if win or len(moves) == 1:
+            score = WIN_SCORE if win else 0
+            return SearchResult(divmod(moves[0], self.board.size), score, 0, 0, time.monotonic() - start)
+        best_move = moves[0]
+        best_score = 0
+        depth_reached = 0
+        for depth in range(1, max_depth + 1):
+            try:
+                score, move = self._root(moves, depth)
+            except SearchTimeout:
+                break
+            best_move = move
+            best_score = score
+            depth_reached = depth
+            moves.remove(move)
+            moves.insert(0, move)
+            if abs(score) >= WIN_SCORE - MAX_DEPTH:
+                break
+        return SearchResult(
+            divmod(best_move, self.board.size), best_score, depth_reached,
+            self.nodes, time.monotonic() - start
+        )
+
+    def _root(self, moves, depth):
+        board = self.board
+        player = self.player
+        opponent = PLAYER_O if player == PLAYER_X else PLAYER_X
+        alpha = -WIN_SCORE - 1
+        best_move = moves[0]
+        for cell in moves:
+            evicted = board.place(cell, player)
+            try:
+                score = -self._negamax(opponent, depth - 1, -WIN_SCORE - 1, -alpha, 1)
+            finally:
+                board.undo(player, cell, evicted)
+            if score > alpha:
+                alpha = score
+                best_move = cell
+        return alpha, best_move
+
+    def _negamax(self, player, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & 63 and time.monotonic() > self.deadline:
+            raise SearchTimeout
+        board = self.board
+        table = self.table
+        tt_move = -1
+        if table is not None and depth > 0:
+            key = board.hash_key(player)
+            entry = table.probe(key)
+            if entry is not None:
+                tt_move = entry[3]
+                if entry[0] >= depth:
+                    score = score_from_table(entry[2], ply, WIN_SCORE)
+                    flag = entry[1]
+                    if flag == EXACT or (flag == LOWER and score >= beta) or (flag == UPPER and score <= alpha):
+                        table.cutoffs += 1
+                        return score
+        moves, win = self.candidates(player, BRANCH_LIMIT)
+        if win:
+            return WIN_SCORE - ply
+        if not moves:
+            return 0
+        if depth <= 0:
+            return self.evaluate(player)
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        opponent = PLAYER_O if player == PLAYER_X else PLAYER_X
+        alpha_orig = alpha
+        best = -WIN_SCORE - 1
+        best_cell = -1
+        for cell in moves:
+            evicted = board.place(cell, player)
+            try:
+                score = -self._negamax(opponent, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.undo(player, cell, evicted)
+            if score > best:
+                best = score
+                best_cell = cell
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        if table is not None:
+            if best <= alpha_orig:
+                flag = UPPER
+            elif best >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            table.store(key, depth, flag, score_to_table(best, ply, WIN_SCORE), best_cell)
+        return best
+
+    def candidates(self, player, limit):
+        board = self.board
+        geo = self.geo
+        opponent = PLAYER_O if player == PLAYER_X else PLAYER_X
+        own = board.bits[player]
+        opp = board.bits[opponent]
+        occupied = own | opp
+        if not occupied:
+            return [geo.center], False
+        near = 0
+        mask = occupied
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            near |= geo.near[low.bit_length() - 1]
+        near &= board.full & ~occupied
+
+        own_counts = board.line_counts[player]
+        opp_counts = board.line_counts[opponent]
+        weights = self.weights
+        win_length = board.win_length
+        scored = []
+        blocks = []
+        fours = []
+        while near:
+            low = near & -near
+            near ^= low
+            cell = low.bit_length() - 1
+            score = 0
+            for li in board.cell_lines[cell]:
+                o = opp_counts[li]
+                if not o:
+                    n = own_counts[li] + 1
+                    if n == win_length:
+                        return [cell], True
+                    if n == win_length - 1:
+                        fours.append(cell)
+                    score += weights[n]
+                elif not own_counts[li]:
+                    if o == win_length - 1:
+                        blocks.append(cell)
+                    score += weights[o]
+            scored.append((score, cell))
+        scored.sort(reverse=True)
+
+        if blocks:
+            forced = set(blocks)
+        else:
+            forced = self._open_three_defence(own, opp)
+            if forced:
+                forced.update(fours)
+        if forced:
+            moves = [cell for _, cell in scored if cell in forced]
+        else:
+            moves = [cell for _, cell in scored]
+        if limit:
+            moves = moves[:limit]
+        return moves, False
+
+    def _open_three_defence(self, own, opp):
+        empty = self.board.full & ~(own | opp)
+        target = self.board.win_length - 2
+        cells = set()
+        for interior, ends in self.geo.open_windows:
+            if own & (interior | ends) or opp & ends:
+                continue
+            if _popcount(opp & interior) != target:
+                continue
+            mask = (interior | ends) & empty
+            while mask:
+                low = mask & -mask
+                mask ^= low
+                cells.add(low.bit_length() - 1)
+        return cells
+
+    def evaluate(self, player):
+        return self.board.score(player)
+
+
+def search(board, player, budget, table=None):
+    return GomokuEngine(board.copy(), player, table).search(budget)
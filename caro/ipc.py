@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import glob
+import inspect
+import json
+import os
+import sys
+
+SOCKET_PATTERN = "caro-*.sock"
+
+
+def socket_path(directory, cluster):
+    return os.path.join(directory, f"caro-{cluster}.sock")
+
+
+def supported():
+    return hasattr(asyncio, "start_unix_server")
+
+
+class IPCServer:
+    def __init__(self, path, handlers):
+        self.path = path
+        self.handlers = handlers
+        self._server = None
+
+    async def start(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._server = await asyncio.start_unix_server(self.handle, path=self.path)
+        os.chmod(self.path, 0o600)
+
+    async def handle(self, reader, writer):
+        try:
+            line = await asyncio.wait_for(reader.readline(), 5)
+            try:
+                request = json.loads(line)
+                handler = self.handlers[request["op"]]
+                result = handler(**request.get("args", {}))
+                if inspect.isawaitable(result):
+                    result = await result
+                response = {"ok": True, "result": result}
+            except (ValueError, KeyError, TypeError) as e:
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+async def request(path, op, timeout=2.0, **args):
+    reader, writer = await asyncio.wait_for(asyncio.open_unix_connection(path), timeout)
+    try:
+        writer.write(json.dumps({"op": op, "args": args}).encode("utf-8") + b"\n")
+        await writer.drain()
+        line = await asyncio.wait_for(reader.readline(), timeout)
+    finally:
+        writer.close()
+    response = json.loads(line)
+    if not response["ok"]:
+        raise RuntimeError(response["error"])
+    return response["result"]
+
+
+async def broadcast(directory, op, timeout=2.0, **args):
+    paths = sorted(glob.glob(os.path.join(directory, SOCKET_PATTERN)))
+    results = await asyncio.gather(
+        *(request(path, op, timeout, **args) for path in paths), return_exceptions=True
+    )
+    replies = []
+    for path, result in zip(paths, results):
+        if isinstance(result, (OSError, asyncio.TimeoutError)):
+            continue
+        if isinstance(result, Exception):
+            print(f"IPC error from {path}: {result}")
+            continue
+        replies.append(result)
+    return replies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query running Caro bot processes")
+    parser.add_argument("op", help="operation to run on every process, e.g. stats")
+    parser.add_argument("--dir", default="/tmp/caro-ipc", help="directory holding the caro-*.sock sockets")
+    args = parser.parse_args(argv)
+    replies = asyncio.run(broadcast(args.dir, args.op))
+    json.dump(replies, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,513 @@
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import discord
+
+from caro import metrics
+from caro.bench import percentile
+
+RESPONSE_DEADLINE = 3.0
+
+_ids = itertools.count(900000000000000000)
+
+
+def snowflake():
+    return next(_ids)
+
+
+class FakeRest:
+    def __init__(self, latency_ms, jitter_ms, rng):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.rng = rng
+        self.calls = {}
+
+    async def call(self, route):
+        self.calls[route] = self.calls.get(route, 0) + 1
+        delay = self.rng.gauss(self.latency, self.jitter) if self.jitter else self.latency
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class FakeRole:
+    def __init__(self, name):
+        self.id = snowflake()
+        self.name = name
+
+
+class FakeMember:
+    def __init__(self, user_id, bot=False, admin=False):
+        self.id = user_id
+        self.bot = bot
+        self.mention = f"<@{user_id}>"
+        self.display_name = f"player{user_id % 100000}"
+        self.guild_permissions = SimpleNamespace(administrator=admin)
+
+
+class FakeMessage:
+    def __init__(self, channel, rest, view=None, message_id=None):
+        self.id = message_id or snowflake()
+        self.channel = channel
+        self.rest = rest
+        self.view = view
+
+    async def edit(self, **kwargs):
+        await self.rest.call("PATCH /channels/{id}/messages/{id}")
+        if "view" in kwargs:
+            self.view = kwargs["view"]
+
+
+class FakeTextChannel:
+    def __init__(self, guild, name, rest, category=None, overwrites=None, topic=None):
+        self.id = snowflake()
+        self.guild = guild
+        self.name = name
+        self.topic = topic
+        self.overwrites = overwrites or {}
+        self.rest = rest
+        self.category = category
+        self.mention = f"<#{self.id}>"
+        self.last_message = None
+
+    async def send(self, embed=None, view=None, **kwargs):
+        await self.rest.call("POST /channels/{id}/messages")
+        self.last_message = FakeMessage(self, self.rest, view)
+        return self.last_message
+
+    async def edit(self, name=None, overwrites=None):
+        await self.rest.call("PATCH /channels/{id}")
+        if name:
+            self.name = name
+        if overwrites is not None:
+            self.overwrites = overwrites
+
+    def overwrites_for(self, target):
+        return self.overwrites.get(target) or discord.PermissionOverwrite()
+
+    async def purge(self, limit=None):
+        await self.rest.call("POST /channels/{id}/messages/bulk-delete")
+        self.last_message = None
+
+    async def delete(self):
+        await self.rest.call("DELETE /channels/{id}")
+        self.guild.channels.pop(self.id, None)
+        if self.category is not None:
+            self.category.children.discard(self)
+
+    def get_partial_message(self, message_id):
+        return FakeMessage(self, self.rest, message_id=message_id)
+
+
+class FakeCategory:
+    def __init__(self, guild, name, rest):
+        self.id = snowflake()
+        self.guild = guild
+        self.name = name
+        self.rest = rest
+        self.children = set()
+
+    @property
+    def text_channels(self):
+        return sorted(self.children, key=lambda channel: channel.id)
+
+    async def create_text_channel(self, name, overwrites=None, topic=None):
+        await self.rest.call("POST /guilds/{id}/channels")
+        channel = FakeTextChannel(self.guild, name, self.rest, self, overwrites, topic)
+        self.children.add(channel)
+        self.guild.channels[channel.id] = channel
+        return channel
+
+
+class FakeGuild:
+    def __init__(self, rest, bot_member, lobbies):
+        self.id = snowflake()
+        self.rest = rest
+        self.me = bot_member
+        self.default_role = FakeRole("@everyone")
+        self.categories = []
+        self.channels = {}
+        self.lobbies = [FakeTextChannel(self, f"lobby-{i}", rest) for i in range(lobbies)]
+        for channel in self.lobbies:
+            self.channels[channel.id] = channel
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def create_category(self, name):
+        await self.rest.call("POST /guilds/{id}/channels")
+        category = FakeCategory(self, name, self.rest)
+        self.categories.append(category)
+        self.channels[category.id] = category
+        return category
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.sent = None
+
+    async def _ack(self, route):
+        interaction = self.interaction
+        if interaction.acked_at is not None:
+            raise RuntimeError("Interaction has already been responded to")
+        await interaction.rest.call(route)
+        interaction.acked_at = time.perf_counter()
+
+    async def send_message(self, content=None, embed=None, view=None, ephemeral=False, **kwargs):
+        await self._ack("POST /interactions/{id}/{token}/callback")
+        message = FakeMessage(self.interaction.channel, self.interaction.rest, view)
+        self.sent = SimpleNamespace(content=content, embed=embed, view=view, message=message)
+        return SimpleNamespace(message_id=message.id)
+
+    async def edit_message(self, **kwargs):
+        await self._ack("POST /interactions/{id}/{token}/callback")
+        if self.interaction.message is not None and "view" in kwargs:
+            self.interaction.message.view = kwargs["view"]
+
+    async def defer(self, **kwargs):
+        await self._ack("POST /interactions/{id}/{token}/callback")
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, embed=None, **kwargs):
+        await self.interaction.rest.call("POST /webhooks/{id}/{token}")
+        return FakeMessage(self.interaction.channel, self.interaction.rest)
+
+
+class FakeInteraction:
+    def __init__(self, rest, user, guild, channel, message=None):
+        self.rest = rest
+        self.user = user
+        self.guild = guild
+        self.guild_id = guild.id
+        self.channel = channel
+        self.channel_id = channel.id
+        self.message = message
+        self.command = None
+        self.extras = {}
+        self.created_at = time.perf_counter()
+        self.acked_at = None
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+
+class FakeBot:
+    def __init__(self, guilds):
+        self.user = FakeMember(1, bot=True)
+        self.guilds = guilds
+        self.shard_ids = None
+        self.shard_count = None
+
+    def add_view(self, view, message_id=None):
+        pass
+
+    def get_partial_messageable(self, channel_id):
+        return SimpleNamespace(id=channel_id, get_partial_message=lambda message_id: None)
+
+    def get_channel(self, channel_id):
+        return None
+
+    async def wait_until_ready(self):
+        pass
+
+
+class LoadTest:
+    def __init__(self, args, cog_module):
+        self.args = args
+        self.cog_module = cog_module
+        self.rng = random.Random(args.seed)
+        self.rest = FakeRest(args.rest_ms, args.rest_jitter_ms, self.rng)
+        self.bot_member = FakeMember(1, bot=True)
+        self.guilds = [FakeGuild(self.rest, self.bot_member, args.channels) for _ in range(args.guilds)]
+        self.bot = FakeBot(self.guilds)
+        self.cog = None
+        self.latencies = []
+        self.unanswered = 0
+        self.errors = 0
+        self.games_started = 0
+        self.games_finished = 0
+        self.moves = 0
+        self.stalls = 0
+        self.deadline = None
+
+    async def interact(self, callback, interaction, *args):
+        try:
+            await callback(interaction, *args)
+        except Exception as e:
+            self.errors += 1
+            if self.errors <= 5:
+                print(f"Callback error: {e!r}")
+        if interaction.acked_at is None:
+            self.unanswered += 1
+        else:
+            self.latencies.append(interaction.acked_at - interaction.created_at)
+        return interaction
+
+    def command(self, name):
+        command = getattr(self.cog_module.CaroCog, name)
+        return lambda interaction, *args: command.callback(self.cog, interaction, *args)
+
+    async def think(self):
+        await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.args.think_ms / 1000)
+
+    def watch(self, game):
+        changed = asyncio.Event()
+        listener = game.listener
+
+        def notify(g):
+            if listener:
+                listener(g)
+            changed.set()
+
+        game.listener = notify
+        return changed
+
+    async def wait_turn(self, game, player, changed, stopped=None):
+        while not game.finished and game.current_player() is not player:
+            if stopped:
+                return False
+            changed.clear()
+            try:
+                await asyncio.wait_for(changed.wait(), self.args.stall_timeout)
+            except asyncio.TimeoutError:
+                self.stalls += 1
+                return False
+        return True
+
+    async def click(self, view, player, game, guild, channel, message):
+        cells = game.board.empty_cells()
+        row, col = divmod(self.rng.choice(cells), game.board.size)
+        custom_id = f"caro_{view.game_key}_{row}_{col}"
+        button = next(item for item in view.children if getattr(item, "custom_id", None) == custom_id)
+        interaction = FakeInteraction(self.rest, player, guild, channel, message)
+        await self.interact(button.callback, interaction)
+        self.moves += 1
+
+    async def reset(self, player, guild, channel):
+        await self.interact(self.command("caro_reset"), FakeInteraction(self.rest, player, guild, channel))
+
+    async def bot_game(self, player, guild):
+        channel = self.rng.choice(guild.lobbies)
+        interaction = await self.interact(self.command("caro_bot"), FakeInteraction(self.rest, player, guild, channel))
+        sent = interaction.response.sent
+        if sent is None or sent.view is None:
+            return
+        self.games_started += 1
+        view = sent.view
+        game = view.game
+        message = sent.message
+        changed = self.watch(game)
+        for _ in range(self.args.max_moves):
+            if not await self.wait_turn(game, player, changed) or game.finished:
+                break
+            await self.think()
+            if game.finished:
+                break
+            await self.click(view, player, game, guild, channel, message)
+        if game.finished:
+            self.games_finished += 1
+        else:
+            await self.reset(player, guild, channel)
+
+    async def pvp_game(self, challenger, challenged, guild):
+        lobby = self.rng.choice(guild.lobbies)
+        interaction = await self.interact(
+            self.command("caro_pvp"), FakeInteraction(self.rest, challenger, guild, lobby), challenged
+        )
+        sent = interaction.response.sent
+        if sent is None or sent.view is None:
+            return
+        challenge = sent.view
+        await self.think()
+        accept = FakeInteraction(self.rest, challenged, guild, lobby, sent.message)
+        await self.interact(challenge.accept.callback, accept)
+        game = self.cog.games.find(self.cog.games.keys_by_user(challenger.id), lambda g: g.is_pvp)[1]
+        if game is None:
+            return
+        self.games_started += 1
+        channel = game.game_channel
+        message = channel.last_message
+        view = message.view
+        changed = self.watch(game)
+        stopped = []
+
+        async def play(player):
+            for _ in range(self.args.max_moves):
+                if not await self.wait_turn(game, player, changed, stopped) or game.finished:
+                    break
+                await self.think()
+                if game.finished:
+                    break
+                await self.click(view, player, game, guild, channel, message)
+            stopped.append(player)
+            changed.set()
+
+        await asyncio.gather(play(challenger), play(challenged))
+        if game.finished:
+            self.games_finished += 1
+        else:
+            await self.reset(challenger, guild, channel)
+
+    async def player(self, index, player, partner):
+        await asyncio.sleep(self.rng.uniform(0, self.args.ramp))
+        guild = self.guilds[index % len(self.guilds)]
+        for _ in range(self.args.games):
+            if time.perf_counter() > self.deadline:
+                return
+            if partner is not None:
+                await self.pvp_game(player, partner, guild)
+            else:
+                await self.bot_game(player, guild)
+
+    def players(self):
+        args = self.args
+        members = [FakeMember(100000 + i) for i in range(args.players)]
+        tasks = []
+        pvp_pairs = 0
+        if args.mode == "pvp":
+            pvp_pairs = args.players // 2
+        elif args.mode == "mixed":
+            pvp_pairs = args.players // 4
+        for i in range(pvp_pairs):
+            tasks.append(self.player(i, members[2 * i], members[2 * i + 1]))
+        for i in range(2 * pvp_pairs, args.players):
+            tasks.append(self.player(i, members[i], None))
+        return tasks
+
+    async def run(self, config):
+        cog_module = self.cog_module
+        cog_module.config_store.snapshot = config
+        self.cog = cog_module.CaroCog(self.bot)
+        await self.cog.cog_load()
+        started = time.perf_counter()
+        self.deadline = started + self.args.duration
+        try:
+            await asyncio.gather(*self.players())
+            await self.cog.updater.flush()
+        finally:
+            elapsed = time.perf_counter() - started
+            await self.cog.cog_unload()
+        return self.report(elapsed)
+
+    def report(self, elapsed):
+        latencies = [t * 1000 for t in self.latencies]
+        updater = self.cog.updater
+        misses = sum(1 for t in self.latencies if t > RESPONSE_DEADLINE)
+        return {
+            "players": self.args.players,
+            "mode": self.args.mode,
+            "elapsed_s": round(elapsed, 2),
+            "games_started": self.games_started,
+            "games_finished": self.games_finished,
+            "moves": self.moves,
+            "moves_per_sec": round(self.moves / elapsed, 1) if elapsed else 0,
+            "interactions": len(self.latencies) + self.unanswered,
+            "ack_p50_ms": round(percentile(latencies, 50), 1),
+            "ack_p95_ms": round(percentile(latencies, 95), 1),
+            "ack_p99_ms": round(percentile(latencies, 99), 1),
+            "ack_max_ms": round(max(latencies), 1) if latencies else 0,
+            "deadline_misses": misses,
+            "unanswered": self.unanswered,
+            "errors": self.errors,
+            "stalled_games": self.stalls,
+            "rest_calls": sum(self.rest.calls.values()),
+            "rest_by_route": dict(sorted(self.rest.calls.items())),
+            "board_edits_sent": updater.sent,
+            "board_edits_coalesced": updater.coalesced,
+            "searches": metrics.SEARCH_SECONDS.merged()[1],
+            "search_p95_ms": round(metrics.SEARCH_SECONDS.quantile(0.95) * 1000, 1),
+            "ponder_hits": self.cog.ponder.hits,
+            "ponder_misses": self.cog.ponder.misses,
+            "channels_created": self.cog.channels.created,
+            "channels_reused": self.cog.channels.reused,
+            "channels_recycled": self.cog.channels.recycled,
+            "channels_deleted": self.cog.channels.deleted,
+            "match_log_records": self.cog.matches.records,
+            "match_log_bytes": self.cog.matches.bytes_written,
+            "loop_lag_p95_ms": round(metrics.LOOP_LAG_SECONDS.quantile(0.95) * 1000, 1),
+            "loop_lag_max_ms": round(metrics.LOOP_LAG_MAX.values.get((), 0) * 1000, 1),
+        }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline Caro cog load test against a fake Discord layer")
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--mode", choices=("bot", "pvp", "mixed"), default="mixed")
+    parser.add_argument("--games", type=int, default=1, help="games per player")
+    parser.add_argument("--max-moves", type=int, default=12, help="moves per player before resetting the game")
+    parser.add_argument("--guilds", type=int, default=20)
+    parser.add_argument("--channels", type=int, default=5, help="lobby channels per guild")
+    parser.add_argument("--think-ms", type=float, default=800)
+    parser.add_argument("--rest-ms", type=float, default=80, help="mean injected REST latency")
+    parser.add_argument("--rest-jitter-ms", type=float, default=30)
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which players join")
+    parser.add_argument("--duration", type=float, default=120.0, help="stop starting new games after this")
+    parser.add_argument("--executor", choices=("process", "thread", "inline"), default="process")
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--bot-delay", type=float, default=0.0)
+    parser.add_argument("--stall-timeout", type=float, default=15.0, help="give up on a game whose turn never comes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fail-on-miss", action="store_true", help="exit non-zero on any deadline miss or error")
+    parser.add_argument("--json", metavar="PATH", help="write the report to PATH ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    from cogs import caro3x3
+
+    workdir = tempfile.mkdtemp(prefix="caro-load-")
+    config = dataclasses.replace(
+        caro3x3.config_store.snapshot,
+        engine_executor=args.executor,
+        engine_workers=args.workers or caro3x3.config_store.snapshot.engine_workers,
+        bot_move_delay=args.bot_delay,
+        channel_delete_delay=0.5,
+        channel_reset_delay=0.5,
+        game_timeout=max(600, args.duration * 2),
+        registry_max_games=max(5000, args.players * 2),
+        store_path=os.path.join(workdir, "games.sqlite3"),
+        match_log_dir=os.path.join(workdir, "matches"),
+        match_stats_path=os.path.join(workdir, "stats.sqlite3"),
+        metrics_port=0,
+        ipc_dir="",
+    )
+    # Keep stdout clean for the JSON report; cog logging goes to stderr.
+    log = contextlib.redirect_stdout(sys.stderr) if args.json == "-" else contextlib.nullcontext()
+    try:
+        with log:
+            report = asyncio.run(LoadTest(args, caro3x3).run(config))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        for key, value in report.items():
+            if key != "rest_by_route":
+                print(f"{key:>22}  {value}")
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+    if args.fail_on_miss and (report["deadline_misses"] or report["unanswered"] or report["errors"]):
+        sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
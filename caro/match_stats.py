@@ -0,0 +1,225 @@
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from caro.core import PLAYER_X, PLAYER_O
+from caro.matchlog import RESULT_ABANDONED, RESULT_DRAW, End, Move, Start, log_paths, scan
+
+PlayerRecord = namedtuple("PlayerRecord", "user_id games wins losses draws abandoned moves last_played")
+
+OPEN_GAME_TTL = 7 * 86400
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    user_id INTEGER PRIMARY KEY,
+    bot INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    draws INTEGER NOT NULL,
+    abandoned INTEGER NOT NULL,
+    moves INTEGER NOT NULL,
+    last_played REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS players_rank ON players (bot, wins DESC, losses);
+CREATE TABLE IF NOT EXISTS open_games (
+    game_id INTEGER PRIMARY KEY,
+    mode INTEGER NOT NULL,
+    player_x INTEGER NOT NULL,
+    player_o INTEGER NOT NULL,
+    x_bot INTEGER NOT NULL,
+    o_bot INTEGER NOT NULL,
+    moves_x INTEGER NOT NULL,
+    moves_o INTEGER NOT NULL,
+    started REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outcomes (
+    mode INTEGER NOT NULL,
+    result INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    PRIMARY KEY (mode, result)
+);
+CREATE TABLE IF NOT EXISTS log_offsets (
+    path TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL
+);
+"""
+
+
+def _signed(value):
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class MatchStats:
+    def __init__(self, path):
+        self.path = path
+        self.ingested = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def ingest(self, directory):
+        records = 0
+        for path in log_paths(directory):
+            records += self._ingest_file(path)
+        self.ingested += records
+        return records
+
+    def _ingest_file(self, path):
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT offset FROM log_offsets WHERE path = ?", (path,)).fetchone()
+                offset = row[0] if row else 0
+                games = {}
+                finished = set()
+                players = {}
+                outcomes = {}
+                records = 0
+                for offset, record in scan(path, offset):
+                    records += 1
+                    game_id = _signed(record.game)
+                    if isinstance(record, Start):
+                        games[game_id] = [record.mode, _signed(record.x), _signed(record.o),
+                                          int(record.x_bot), int(record.o_bot), 0, 0, record.time / 1000]
+                        finished.discard(game_id)
+                        continue
+                    game = games.get(game_id) if game_id in games else self._load_game(game_id, finished)
+                    if game is None:
+                        continue
+                    games[game_id] = game
+                    if isinstance(record, Move):
+                        game[5 if record.player == PLAYER_X else 6] += 1
+                    elif isinstance(record, End):
+                        self._score(game, record, players, outcomes)
+                        del games[game_id]
+                        finished.add(game_id)
+                if records:
+                    self._commit(path, offset, games, finished, players, outcomes)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return records
+
+    def _load_game(self, game_id, finished):
+        if game_id in finished:
+            return None
+        row = self._conn.execute(
+            "SELECT mode, player_x, player_o, x_bot, o_bot, moves_x, moves_o, started "
+            "FROM open_games WHERE game_id = ?", (game_id,)
+        ).fetchone()
+        return list(row) if row else None
+
+    def _score(self, game, record, players, outcomes):
+        mode, x, o, x_bot, o_bot, moves_x, moves_o, _ = game
+        played = record.time / 1000
+        for user_id, bot, side, moves in ((x, x_bot, PLAYER_X, moves_x), (o, o_bot, PLAYER_O, moves_o)):
+            totals = players.setdefault(user_id, [bot, 0, 0, 0, 0, 0, 0, 0.0])
+            totals[1] += 1
+            if record.result == RESULT_ABANDONED:
+                totals[5] += 1
+            elif record.result == RESULT_DRAW:
+                totals[4] += 1
+            elif record.result == side:
+                totals[2] += 1
+            else:
+                totals[3] += 1
+            totals[6] += moves
+            totals[7] = max(totals[7], played)
+        key = (mode, record.result)
+        outcomes[key] = outcomes.get(key, 0) + 1
+
+    def _commit(self, path, offset, games, finished, players, outcomes):
+        conn = self._conn
+        if finished:
+            conn.executemany("DELETE FROM open_games WHERE game_id = ?", [(g,) for g in finished])
+        if games:
+            conn.executemany(
+                "INSERT OR REPLACE INTO open_games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(game_id, *game) for game_id, game in games.items()]
+            )
+        if players:
+            conn.executemany(
+                "INSERT INTO players VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(user_id) DO UPDATE SET "
+                "games = games + excluded.games, wins = wins + excluded.wins, losses = losses + excluded.losses, "
+                "draws = draws + excluded.draws, abandoned = abandoned + excluded.abandoned, "
+                "moves = moves + excluded.moves, last_played = max(last_played, excluded.last_played)",
+                [(user_id, *totals) for user_id, totals in players.items()]
+            )
+        if outcomes:
+            conn.executemany(
+                "INSERT INTO outcomes VALUES (?, ?, ?) ON CONFLICT(mode, result) DO UPDATE SET "
+                "games = games + excluded.games",
+                [(mode, result, count) for (mode, result), count in outcomes.items()]
+            )
+        conn.execute("DELETE FROM open_games WHERE started < ?", (time.time() - OPEN_GAME_TTL,))
+        conn.execute(
+            "INSERT INTO log_offsets VALUES (?, ?) ON CONFLICT(path) DO UPDATE SET offset = excluded.offset",
+            (path, offset)
+        )
+
+    def leaderboard(self, limit=10):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id, games, wins, losses, draws, abandoned, moves, last_played FROM players "
+                "WHERE bot = 0 ORDER BY wins DESC, losses LIMIT ?", (limit,)
+            ).fetchall()
+        return [PlayerRecord(*row) for row in rows]
+
+    def player(self, user_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_id, games, wins, losses, draws, abandoned, moves, last_played FROM players "
+                "WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return PlayerRecord(*row) if row else None
+
+    def outcomes(self):
+        with self._lock:
+            return self._conn.execute("SELECT mode, result, games FROM outcomes ORDER BY mode, result").fetchall()
+
+    def close(self):
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.close()
+            self._conn = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate Caro match logs into the stats index")
+    parser.add_argument("--dir", default="match_logs", help="directory holding the matches-*.bin logs")
+    parser.add_argument("--db", default="caro_stats.sqlite3", help="stats index to update")
+    parser.add_argument("--user", type=int, help="print one player's record instead of the leaderboard")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+    stats = MatchStats(args.db)
+    stats.open()
+    try:
+        started = time.perf_counter()
+        records = stats.ingest(args.dir)
+        print(f"Ingested {records} records in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+        if args.user is not None:
+            record = stats.player(args.user)
+            result = record._asdict() if record else None
+        else:
+            result = [record._asdict() for record in stats.leaderboard(args.limit)]
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    finally:
+        stats.close()
+
+
+if __name__ == "__main__":
+    main()
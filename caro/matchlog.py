@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import glob
+import itertools
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from caro.core import PLAYER_X, PLAYER_O
+
+MAGIC = b"CAROLOG1"
+FILE_PATTERN = "matches-*.bin"
+
+KIND_START = 1
+KIND_MOVE = 2
+KIND_END = 3
+
+MODE_BOT = 0
+MODE_PVP = 1
+MODE_GOMOKU = 2
+MODE_NAMES = ("bot", "pvp", "gomoku")
+
+RESULT_DRAW = 0
+RESULT_ABANDONED = 3
+RESULT_NAMES = ("draw", "x", "o", "abandoned")
+
+EVICTED = 4
+
+# kind, game id, mode, bot flags, player x id, player o id, time (ms)
+START = struct.Struct("<BQBBQQQ")
+# kind, game id, cell, player | EVICTED, time (ms)
+MOVE = struct.Struct("<BQBBQ")
+# kind, game id, result, time (ms)
+END = struct.Struct("<BQBQ")
+FORMATS = {KIND_START: START, KIND_MOVE: MOVE, KIND_END: END}
+
+Start = namedtuple("Start", "game mode x o x_bot o_bot time")
+Move = namedtuple("Move", "game cell player evicted time")
+End = namedtuple("End", "game result time")
+
+
+def now_ms():
+    return time.time_ns() // 1_000_000
+
+
+def game_mode(game):
+    if game.is_pvp:
+        return MODE_PVP
+    return MODE_GOMOKU if game.advanced else MODE_BOT
+
+
+def log_paths(directory):
+    return sorted(glob.glob(os.path.join(directory, FILE_PATTERN)))
+
+
+class MatchLog:
+    def __init__(self, directory, cluster=0, flush_interval=1.0):
+        self.directory = directory
+        self.cluster = cluster
+        self.flush_interval = flush_interval
+        self.records = 0
+        self.bytes_written = 0
+        self.flushes = 0
+        self._buffer = bytearray()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def new_game_id(self):
+        return (now_ms() << 20) | ((self.cluster & 0xFF) << 12) | (next(self._sequence) & 0xFFF)
+
+    def path(self, day=None):
+        day = day or time.strftime("%Y%m%d", time.gmtime())
+        return os.path.join(self.directory, f"matches-{day}-{self.cluster}.bin")
+
+    def start(self, game):
+        game.match_id = self.new_game_id()
+        x, o = game.player_x, game.player_o
+        bots = (1 if x.bot else 0) | (2 if o.bot else 0)
+        self._buffer += START.pack(KIND_START, game.match_id, game_mode(game), bots, x.id, o.id, now_ms())
+        self.records += 1
+        for player in (PLAYER_X, PLAYER_O):
+            for cell in game.board.history(player):
+                self._buffer += MOVE.pack(KIND_MOVE, game.match_id, cell, player, now_ms())
+                self.records += 1
+
+    def move(self, game):
+        if game.match_id is None or game.last_move is None:
+            return
+        cell = game.last_move
+        flags = game.board.get(*divmod(cell, game.board.size)) | (EVICTED if game.last_evicted >= 0 else 0)
+        self._buffer += MOVE.pack(KIND_MOVE, game.match_id, cell, flags, now_ms())
+        self.records += 1
+
+    def end(self, game, abandoned=False):
+        if game.match_id is None:
+            return
+        result = RESULT_ABANDONED if abandoned else game.winner or RESULT_DRAW
+        self._buffer += END.pack(KIND_END, game.match_id, result, now_ms())
+        self.records += 1
+        game.match_id = None
+
+    def _write(self, data):
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.path(), "ab") as f:
+                if f.tell() == 0:
+                    f.write(MAGIC)
+                f.write(data)
+        self.bytes_written += len(data)
+        self.flushes += 1
+
+    async def flush(self):
+        if not self._buffer:
+            return
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        await asyncio.to_thread(self._write, data)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except OSError as e:
+                print(f"Match log error: {e}")
+
+    def close(self):
+        if self._buffer:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            self._write(data)
+
+
+def scan(path, offset=0, chunk_size=1 << 16):
+    with open(path, "rb") as f:
+        if offset == 0:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a match log")
+            offset = len(MAGIC)
+        else:
+            f.seek(offset)
+        data = b""
+        pos = 0
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            data = data[pos:] + chunk
+            pos = 0
+            while pos < len(data):
+                fmt = FORMATS.get(data[pos])
+                if fmt is None:
+                    raise ValueError(f"{path}: unknown record kind {data[pos]} at offset {offset}")
+                if pos + fmt.size > len(data):
+                    break
+                values = fmt.unpack_from(data, pos)
+                pos += fmt.size
+                offset += fmt.size
+                yield offset, _record(values)
+
+
+def _record(values):
+    kind = values[0]
+    if kind == KIND_MOVE:
+        _, game, cell, flags, ms = values
+        return Move(game, cell, flags & 3, bool(flags & EVICTED), ms)
+    if kind == KIND_START:
+        _, game, mode, bots, x, o, ms = values
+        return Start(game, mode, x, o, bool(bots & 1), bool(bots & 2), ms)
+    _, game, result, ms = values
+    return End(game, result, ms)
+
+
+def iter_records(paths):
+    for path in paths:
+        for _, record in scan(path):
+            yield record
+
+
+def to_json(record):
+    if isinstance(record, Move):
+        return {"type": "move", "game": record.game, "cell": record.cell, "player": record.player,
+                "evicted": record.evicted, "time": record.time}
+    if isinstance(record, Start):
+        return {"type": "start", "game": record.game, "mode": MODE_NAMES[record.mode],
+                "player_x": record.x, "player_o": record.o, "x_bot": record.x_bot, "o_bot": record.o_bot,
+                "time": record.time}
+    return {"type": "end", "game": record.game, "result": RESULT_NAMES[record.result], "time": record.time}
+
+
+def export_jsonl(paths, out):
+    count = 0
+    for record in iter_records(paths):
+        out.write(json.dumps(to_json(record)))
+        out.write("\n")
+        count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export Caro match logs as JSON lines")
+    parser.add_argument("paths", nargs="*", help="log files to export (default: every log in --dir)")
+    parser.add_argument("--dir", default="match_logs", help="directory holding the matches-*.bin logs")
+    parser.add_argument("--out", default="-", help="output file ('-' for stdout)")
+    args = parser.parse_args(argv)
+    paths = args.paths or log_paths(args.dir)
+    if args.out == "-":
+        count = export_jsonl(paths, sys.stdout)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            count = export_jsonl(paths, f)
+    print(f"Exported {count} records from {len(paths)} logs", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
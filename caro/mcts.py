@@ -0,0 +1,165 @@
+import math
+import random
+import time
+from collections import namedtuple
+
+from caro import gomoku
+from caro.core import PLAYER_X, PLAYER_O, SearchResult
+
+EXPLORATION = 1.4
+ROLLOUT_PLIES = 40
+BRANCH_LIMIT = 12
+
+RootStats = namedtuple("RootStats", "children iterations depth elapsed")
+
+
+class Node:
+    __slots__ = ("move", "player", "parent", "children", "untried", "visits", "wins", "winner")
+
+    def __init__(self, move, player, parent):
+        self.move = move
+        self.player = player
+        self.parent = parent
+        self.children = []
+        self.untried = None
+        self.visits = 0
+        self.wins = 0.0
+        self.winner = None
+
+
+class MCTSEngine:
+    def __init__(self, board, player, exploration=EXPLORATION, rollout_plies=ROLLOUT_PLIES, seed=None):
+        self.board = board
+        self.player = player
+        self.exploration = exploration
+        self.rollout_plies = rollout_plies
+        self.rng = random.Random(seed)
+        self.advanced = board.max_pieces >= board.size * board.size
+        self.tactics = gomoku.GomokuEngine(board, player) if self.advanced else None
+        self.near = gomoku.geometry(board.size, board.win_length).near if self.advanced else None
+
+    def moves(self, player):
+        if self.advanced:
+            moves, _ = self.tactics.candidates(player, BRANCH_LIMIT)
+            return moves
+        return self.board.empty_cells()
+
+    def run(self, budget):
+        board = self.board
+        rng = self.rng
+        start = time.monotonic()
+        deadline = start + budget
+        root = Node(None, PLAYER_O if self.player == PLAYER_X else PLAYER_X, None)
+        root.untried = self.moves(self.player)
+        iterations = 0
+        max_depth = 0
+        while iterations & 15 or time.monotonic() < deadline:
+            iterations += 1
+            node = root
+            placed = []
+            while not node.untried and node.children and node.winner is None:
+                node = self.select(node)
+                placed.append((node.player, node.move, board.place(node.move, node.player)))
+            if node.winner is None and node.untried:
+                player = PLAYER_O if node.player == PLAYER_X else PLAYER_X
+                cell = node.untried.pop(rng.randrange(len(node.untried)))
+                child = Node(cell, player, node)
+                node.children.append(child)
+                node = child
+                placed.append((player, cell, board.place(cell, player)))
+                if board.has_line(player):
+                    child.winner = player
+                else:
+                    child.untried = self.moves(PLAYER_O if player == PLAYER_X else PLAYER_X)
+                    if not child.untried:
+                        child.winner = 0
+            max_depth = max(max_depth, len(placed))
+            winner = node.winner
+            if winner is None:
+                winner = self.rollout(PLAYER_O if node.player == PLAYER_X else PLAYER_X)
+            for player, cell, evicted in reversed(placed):
+                board.undo(player, cell, evicted)
+            while node is not None:
+                node.visits += 1
+                if winner == node.player:
+                    node.wins += 1
+                elif not winner:
+                    node.wins += 0.5
+                node = node.parent
+        children = {child.move: (child.visits, child.wins) for child in root.children}
+        return RootStats(children, iterations, max_depth, time.monotonic() - start)
+
+    def select(self, node):
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        best = None
+        best_value = -1.0
+        for child in node.children:
+            value = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if value > best_value:
+                best_value = value
+                best = child
+        return best
+
+    def rollout(self, player):
+        board = self.board
+        rng = self.rng
+        near = self.near
+        placed = []
+        winner = None
+        frontier = 0
+        if near is not None:
+            mask = board.bits[PLAYER_X] | board.bits[PLAYER_O]
+            while mask:
+                low = mask & -mask
+                mask ^= low
+                frontier |= near[low.bit_length() - 1]
+        try:
+            for _ in range(self.rollout_plies):
+                empty = board.empty_mask()
+                if not empty:
+                    return 0
+                choices = frontier & empty or empty
+                cells = []
+                while choices:
+                    low = choices & -choices
+                    choices ^= low
+                    cells.append(low.bit_length() - 1)
+                cell = cells[rng.randrange(len(cells))]
+                placed.append((player, cell, board.place(cell, player)))
+                if board.has_line(player):
+                    winner = player
+                    break
+                if near is not None:
+                    frontier |= near[cell]
+                player = PLAYER_O if player == PLAYER_X else PLAYER_X
+            else:
+                balance = board.balance
+                winner = PLAYER_X if balance > 0 else PLAYER_O if balance < 0 else 0
+        finally:
+            for player, cell, evicted in reversed(placed):
+                board.undo(player, cell, evicted)
+        return winner
+
+
+def run(board, player, budget, exploration=EXPLORATION, rollout_plies=ROLLOUT_PLIES, seed=None):
+    return MCTSEngine(board.copy(), player, exploration, rollout_plies, seed).run(budget)
+
+
+def merge(stats, size):
+    children = {}
+    iterations = 0
+    depth = 0
+    elapsed = 0.0
+    for part in stats:
+        for cell, (visits, wins) in part.children.items():
+            total = children.get(cell)
+            children[cell] = (visits, wins) if total is None else (total[0] + visits, total[1] + wins)
+        iterations += part.iterations
+        depth = max(depth, part.depth)
+        elapsed = max(elapsed, part.elapsed)
+    if not children:
+        return SearchResult(None, 0, depth, iterations, elapsed)
+    cell, (visits, wins) = max(children.items(), key=lambda item: item[1][0])
+    score = round(1000 * (2 * wins / visits - 1))
+    return SearchResult(divmod(cell, size), score, depth, iterations, elapsed)
@@ -0,0 +1,304 @@
+import asyncio
+import bisect
+import functools
+import math
+import re
+import time
+
+import aiohttp
+from aiohttp import web
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+NODE_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000)
+DEPTH_BUCKETS = (1, 2, 3, 4, 6, 8, 10, 12, 16)
+
+_ROUTE_ID = re.compile(r"/\d+(?=/|$)")
+_ROUTE_TOKEN = re.compile(r"(/(?:interactions|webhooks)/\{id\})/[^/]+")
+_API_PREFIX = re.compile(r"^/api/v\d+")
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=None):
+    items = list(key) + (extra or [])
+    if not items:
+        return ""
+    body = ",".join(f'{name}="{str(value)}"' for name, value in items)
+    return "{" + body + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def total(self, **labels):
+        want = set(labels.items())
+        return sum(v for key, v in self.values.items() if want <= set(key))
+
+    def lines(self):
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [[0] * (len(self.buckets) + 1), 0, 0.0, 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += 1
+        series[2] += value
+        if value > series[3]:
+            series[3] = value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def merged(self, **labels):
+        want = set(labels.items())
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0
+        value_sum = 0.0
+        peak = 0.0
+        for key, (bucket_counts, count, series_sum, series_max) in self.series.items():
+            if want <= set(key):
+                for i, n in enumerate(bucket_counts):
+                    counts[i] += n
+                total += count
+                value_sum += series_sum
+                peak = max(peak, series_max)
+        return counts, total, value_sum, peak
+
+    def quantile(self, q, **labels):
+        counts, total, _, peak = self.merged(**labels)
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        lower = 0.0
+        for i, n in enumerate(counts):
+            upper = min(self.buckets[i] if i < len(self.buckets) else peak, peak)
+            if n and seen + n >= rank:
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+            lower = upper
+        return peak
+
+    def mean(self, **labels):
+        _, total, value_sum, _ = self.merged(**labels)
+        return value_sum / total if total else 0.0
+
+    def lines(self):
+        for key, (counts, total, value_sum, _) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = _format_labels(key, [("le", _format_value(bound))])
+                yield f"{self.name}_bucket{le} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(key)} {_format_value(value_sum)}"
+            yield f"{self.name}_count{_format_labels(key)} {total}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help, fn=None):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.values = {}
+
+    def set(self, value, **labels):
+        self.values[_label_key(labels)] = value
+
+    def lines(self):
+        values = self.values
+        if self.fn is not None:
+            result = self.fn()
+            if isinstance(result, (int, float)):
+                values = {(): result}
+            else:
+                values = {_label_key(labels): value for labels, value in result}
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help):
+        return self.add(Counter(name, help))
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        return self.add(Histogram(name, help, buckets))
+
+    def gauge(self, name, help, fn=None):
+        return self.add(Gauge(name, help, fn))
+
+    def remove(self, name):
+        self.metrics.pop(name, None)
+
+    def render(self):
+        out = []
+        for metric in list(self.metrics.values()):
+            try:
+                lines = list(metric.lines())
+            except Exception as e:
+                print(f"Metrics error in {metric.name}: {e}")
+                continue
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = Registry()
+
+COMMAND_SECONDS = REGISTRY.histogram("caro_command_seconds", "Slash command handling time")
+COMMAND_ERRORS = REGISTRY.counter("caro_command_errors_total", "Slash commands that raised")
+INTERACTION_SECONDS = REGISTRY.histogram("caro_interaction_seconds", "Button and select callback time")
+REST_REQUESTS = REGISTRY.counter("caro_rest_requests_total", "Discord REST requests by route and status")
+REST_SECONDS = REGISTRY.histogram("caro_rest_seconds", "Discord REST request duration")
+SEARCH_SECONDS = REGISTRY.histogram("caro_search_seconds", "Bot move search time")
+SEARCH_NODES = REGISTRY.histogram("caro_search_nodes", "Nodes or playouts per bot move", NODE_BUCKETS)
+SEARCH_DEPTH = REGISTRY.histogram("caro_search_depth", "Depth reached per bot move", DEPTH_BUCKETS)
+TT_PROBES = REGISTRY.counter("caro_tt_probes_total", "Transposition table probes made by bot searches")
+TT_HITS = REGISTRY.counter("caro_tt_hits_total", "Transposition table probes that found an entry")
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "caro_loop_lag_seconds", "Event loop scheduling delay", (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+LOOP_LAG_MAX = REGISTRY.gauge("caro_loop_lag_max_seconds", "Worst event loop delay since start")
+
+
+def route(path):
+    path = _API_PREFIX.sub("", path)
+    path = _ROUTE_ID.sub("/{id}", path)
+    return _ROUTE_TOKEN.sub(r"\1/{token}", path)
+
+
+def http_trace():
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_start(session, ctx, params):
+        ctx.started = time.perf_counter()
+
+    async def on_request_end(session, ctx, params):
+        path = route(params.url.path)
+        REST_REQUESTS.inc(method=params.method, route=path, status=params.response.status)
+        REST_SECONDS.observe(time.perf_counter() - ctx.started, method=params.method, route=path)
+
+    async def on_request_exception(session, ctx, params):
+        path = route(params.url.path)
+        REST_REQUESTS.inc(method=params.method, route=path, status="error")
+        REST_SECONDS.observe(time.perf_counter() - ctx.started, method=params.method, route=path)
+
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+    return trace
+
+
+def timed(histogram, **labels):
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_search(result, engine, mode, source="search"):
+    SEARCH_SECONDS.observe(result.elapsed, engine=engine, mode=mode, source=source)
+    SEARCH_NODES.observe(result.nodes, engine=engine, mode=mode, source=source)
+    SEARCH_DEPTH.observe(result.depth, engine=engine, mode=mode, source=source)
+    if result.tt_probes:
+        TT_PROBES.inc(result.tt_probes, mode=mode)
+        TT_HITS.inc(result.tt_hits, mode=mode)
+
+
+async def watch_loop_lag(interval=0.5):
+    worst = 0.0
+    LOOP_LAG_MAX.set(worst)
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        LOOP_LAG_SECONDS.observe(lag)
+        if lag > worst:
+            worst = lag
+            LOOP_LAG_MAX.set(worst)
+
+
+class MetricsServer:
+    def __init__(self, host, port, registry=REGISTRY):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._runner = None
+
+    async def handle(self, request):
+        return web.Response(text=self.registry.render(), content_type="text/plain")
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"Metrics listening on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
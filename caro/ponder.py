@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+from caro.executor import SearchCancelled
+from caro.game import ponder_snapshot
+
+
+class Ponderer:
+    def __init__(self, engine):
+        self.engine = engine
+        self.hits = 0
+        self.misses = 0
+        self._tasks = {}
+        self._results = {}
+
+    def start(self, key, game):
+        self.cancel(key)
+        config = game.config
+        if not config.ponder_enabled or game.finished or game.is_pvp or self.engine.mode == "inline":
+            return
+        cells = game.reply_candidates()[:config.ponder_max_moves]
+        results = {}
+        self._results[key] = results
+        self._tasks[key] = asyncio.create_task(
+            self._ponder(key, game.snapshot(), cells, results, config.ponder_budget)
+        )
+
+    async def _ponder(self, key, snapshot, cells, results, budget):
+        deadline = time.monotonic() + budget
+        for cell in cells:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self.engine.pending() >= self.engine.workers:
+                break
+            try:
+                hit = await self.engine.run(
+                    f"{key}:ponder", ponder_snapshot, snapshot, cell, remaining, timeout=remaining + 1
+                )
+            except (SearchCancelled, asyncio.TimeoutError):
+                break
+            if hit:
+                results[hit[0]] = hit[1]
+
+    def take(self, key, game):
+        results = self._results.get(key)
+        if results is None:
+            return None
+        result = results.get(game.signature())
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        self.cancel(key)
+        return result
+
+    def cancel(self, key):
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+        self.engine.cancel(f"{key}:ponder")
+        self._results.pop(key, None)
+
+    def shutdown(self):
+        for key in list(self._tasks):
+            self.cancel(key)
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class GameEntry:
+    __slots__ = ("key", "game", "channel_id", "guild_id", "user_ids", "created", "touched")
+
+    def __init__(self, key, game, now):
+        self.key = key
+        self.game = game
+        self.channel_id = game.channel_id
+        self.guild_id = game.guild_id
+        self.user_ids = tuple({p.id for p in (game.player_x, game.player_o) if p is not None and not p.bot})
+        self.created = now
+        self.touched = now
+
+
+class GameRegistry:
+    def __init__(self, ttl, max_games, on_evict=None):
+        self.ttl = ttl
+        self.max_games = max_games
+        self.on_evict = on_evict
+        self.added = 0
+        self.removed = 0
+        self.expired = 0
+        self.evicted = 0
+        self._entries = OrderedDict()
+        self._by_channel = {}
+        self._by_user = {}
+        self._by_guild = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __iter__(self):
+        return iter(list(self._entries))
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        return entry.game if entry else None
+
+    def games(self):
+        return [entry.game for entry in self._entries.values()]
+
+    def add(self, key, game):
+        if key in self._entries:
+            self._unindex(self._entries.pop(key))
+        entry = GameEntry(key, game, time.monotonic())
+        self._entries[key] = entry
+        self._index(self._by_channel, entry.channel_id, key)
+        self._index(self._by_guild, entry.guild_id, key)
+        for user_id in entry.user_ids:
+            self._index(self._by_user, user_id, key)
+        self.added += 1
+        if len(self._entries) > self.max_games:
+            self._evict_over_cap()
+
+    def pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._unindex(entry)
+        self.removed += 1
+        return entry.game
+
+    def touch(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.touched = time.monotonic()
+            self._entries.move_to_end(key)
+
+    def keys_by_channel(self, channel_id):
+        return list(self._by_channel.get(channel_id, ()))
+
+    def keys_by_user(self, user_id):
+        return list(self._by_user.get(user_id, ()))
+
+    def keys_by_guild(self, guild_id):
+        return list(self._by_guild.get(guild_id, ()))
+
+    def find(self, keys, predicate=None):
+        for key in keys:
+            game = self.get(key)
+            if game is not None and not game.finished and (predicate is None or predicate(game)):
+                return key, game
+        return None, None
+
+    def sweep(self, now=None):
+        now = time.monotonic() if now is None else now
+        stale = [
+            key for key, entry in self._entries.items()
+            if now - entry.touched > self.ttl
+        ]
+        for key in stale:
+            self._evict(key)
+            self.expired += 1
+        self._evict_over_cap()
+        return stale
+
+    def _evict_over_cap(self):
+        while len(self._entries) > self.max_games:
+            key = next(iter(self._entries))
+            self._evict(key)
+            self.evicted += 1
+
+    def _evict(self, key):
+        entry = self._entries.pop(key)
+        self._unindex(entry)
+        if self.on_evict:
+            self.on_evict(key, entry.game)
+
+    async def run(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            self.sweep()
+
+    def stats(self):
+        return {
+            "games": len(self._entries),
+            "active": sum(1 for entry in self._entries.values() if not entry.game.finished),
+            "channels": len(self._by_channel),
+            "users": len(self._by_user),
+            "guilds": len(self._by_guild),
+            "added": self.added,
+            "removed": self.removed,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+    @staticmethod
+    def _index(index, value, key):
+        if value is not None:
+            index.setdefault(value, set()).add(key)
+
+    def _unindex(self, entry):
+        for index, value in ((self._by_channel, entry.channel_id), (self._by_guild, entry.guild_id)):
+            self._drop(index, value, entry.key)
+        for user_id in entry.user_ids:
+            self._drop(self._by_user, user_id, entry.key)
+
+    @staticmethod
+    def _drop(index, value, key):
+        keys = index.get(value)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del index[value]
@@ -0,0 +1,96 @@
+import io
+from collections import OrderedDict
+from functools import lru_cache
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    Image = None
+
+from caro.core import EMPTY, PLAYER_X, PLAYER_O
+
+MARGIN_PX = 24
+BACKGROUND = (43, 45, 49)
+CELL_COLOR = (222, 184, 135)
+HIGHLIGHT_COLOR = (250, 220, 120)
+GRID_COLOR = (120, 90, 60)
+LABEL_COLOR = (220, 221, 222)
+X_COLOR = (200, 40, 40)
+O_COLOR = (40, 80, 200)
+
+
+def available():
+    return Image is not None
+
+
+@lru_cache(maxsize=None)
+def sprite(kind, cell_px, highlighted):
+    img = Image.new("RGB", (cell_px, cell_px), HIGHLIGHT_COLOR if highlighted else CELL_COLOR)
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, cell_px - 1, cell_px - 1), outline=GRID_COLOR)
+    pad = cell_px // 5
+    width = max(2, cell_px // 10)
+    if kind == PLAYER_X:
+        draw.line((pad, pad, cell_px - pad, cell_px - pad), fill=X_COLOR, width=width)
+        draw.line((pad, cell_px - pad, cell_px - pad, pad), fill=X_COLOR, width=width)
+    elif kind == PLAYER_O:
+        draw.ellipse((pad, pad, cell_px - pad, cell_px - pad), outline=O_COLOR, width=width)
+    return img
+
+
+@lru_cache(maxsize=None)
+def base_image(size, cell_px):
+    side = MARGIN_PX + size * cell_px + 1
+    img = Image.new("RGB", (side, side), BACKGROUND)
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default()
+    for i in range(size):
+        label = str(i + 1)
+        center = MARGIN_PX + i * cell_px + cell_px // 2
+        draw.text((center, MARGIN_PX // 2), label, fill=LABEL_COLOR, font=font, anchor="mm")
+        draw.text((MARGIN_PX // 2, center), label, fill=LABEL_COLOR, font=font, anchor="mm")
+    empty = sprite(EMPTY, cell_px, False)
+    for cell in range(size * size):
+        r, c = divmod(cell, size)
+        img.paste(empty, (MARGIN_PX + c * cell_px, MARGIN_PX + r * cell_px))
+    return img
+
+
+class BoardRenderer:
+    def __init__(self, cell_px=40, max_games=256):
+        self.cell_px = cell_px
+        self.max_games = max_games
+        self._canvases = OrderedDict()
+
+    def render(self, key, board, highlights=()):
+        size = board.size
+        cell_px = self.cell_px
+        entry = self._canvases.get(key)
+        if entry is None or len(entry[1]) != size * size:
+            entry = (base_image(size, cell_px).copy(), [(EMPTY, False)] * (size * size))
+            self._canvases[key] = entry
+            while len(self._canvases) > self.max_games:
+                self._canvases.popitem(last=False)
+        else:
+            self._canvases.move_to_end(key)
+        canvas, cells = entry
+        bits_x = board.bits[PLAYER_X]
+        bits_o = board.bits[PLAYER_O]
+        for cell in range(size * size):
+            if (bits_x >> cell) & 1:
+                kind = PLAYER_X
+            elif (bits_o >> cell) & 1:
+                kind = PLAYER_O
+            else:
+                kind = EMPTY
+            state = (kind, cell in highlights)
+            if cells[cell] != state:
+                cells[cell] = state
+                r, c = divmod(cell, size)
+                canvas.paste(sprite(kind, cell_px, state[1]), (MARGIN_PX + c * cell_px, MARGIN_PX + r * cell_px))
+        buf = io.BytesIO()
+        canvas.save(buf, "PNG", compress_level=1)
+        return buf.getvalue()
+
+    def forget(self, key):
+        self._canvases.pop(key, None)
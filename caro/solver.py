@@ -0,0 +1,276 @@
+import array
+import bisect
+import os
+import struct
+from collections import deque
+
+from caro.core import PLAYER_X, PLAYER_O, line_masks
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+TABLE_MAGIC = b"CARO"
+TABLE_VERSION = 1
+_HEADER = struct.Struct("<4sBBBI")
+
+
+def symmetries(size):
+    n = size - 1
+    transforms = (
+        lambda r, c: (r, c),
+        lambda r, c: (c, n - r),
+        lambda r, c: (n - r, n - c),
+        lambda r, c: (n - c, r),
+        lambda r, c: (r, n - c),
+        lambda r, c: (n - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (n - c, n - r),
+    )
+    perms = []
+    for t in transforms:
+        perm = []
+        for r in range(size):
+            for c in range(size):
+                tr, tc = t(r, c)
+                perm.append(tr * size + tc)
+        perms.append(tuple(perm))
+    return perms
+
+
+class SolutionTable:
+    def __init__(self, size, max_pieces, keys, values, distances, moves):
+        self.size = size
+        self.max_pieces = max_pieces
+        self.keys = keys
+        self.values = values
+        self.distances = distances
+        self.moves = moves
+        self._perms = symmetries(size)
+        self._inverse = [tuple(sorted(range(len(p)), key=p.__getitem__)) for p in self._perms]
+        self._base = size * size + 1
+        self._shift = self._base ** max_pieces
+
+    def __len__(self):
+        return len(self.keys)
+
+    def matches(self, size, max_pieces):
+        return self.size == size and self.max_pieces == max_pieces
+
+    def _encode(self, history):
+        v = 0
+        for cell in history:
+            v = v * self._base + cell + 1
+        return v
+
+    def _key(self, hx, ho, turn):
+        return (self._encode(hx) * self._shift + self._encode(ho)) * 2 + (turn == PLAYER_O)
+
+    def canonical(self, hx, ho, turn):
+        best = None
+        best_t = 0
+        for t, perm in enumerate(self._perms):
+            k = self._key([perm[c] for c in hx], [perm[c] for c in ho], turn)
+            if best is None or k < best:
+                best = k
+                best_t = t
+        return best, best_t
+
+    def probe(self, history_x, history_o, turn):
+        size = self.size
+        hx = [r * size + c for r, c in history_x]
+        ho = [r * size + c for r, c in history_o]
+        key, t = self.canonical(hx, ho, turn)
+        keys = self.keys
+        slot = bisect.bisect_left(keys, key)
+        if slot == len(keys) or keys[slot] != key:
+            return None
+        move = self.moves[slot]
+        if move < 0:
+            return self.values[slot], self.distances[slot], None
+        cell = self._inverse[t][move]
+        return self.values[slot], self.distances[slot], divmod(cell, size)
+
+    def best_move(self, history_x, history_o, turn):
+        hit = self.probe(history_x, history_o, turn)
+        if hit is None:
+            return None
+        return hit[2]
+
+    @classmethod
+    def build(cls, size, max_pieces):
+        lines = line_masks(size, size)
+        cells = size * size
+        shell = cls(size, max_pieces, [], array.array("b"), array.array("B"), array.array("b"))
+
+        def has_line(history):
+            mask = 0
+            for cell in history:
+                mask |= 1 << cell
+            for line in lines:
+                if mask & line == line:
+                    return True
+            return False
+
+        states = []
+        index = {}
+        queue = deque()
+        for turn in (PLAYER_X, PLAYER_O):
+            key, _ = shell.canonical((), (), turn)
+            if key not in index:
+                index[key] = len(states)
+                states.append(((), (), turn))
+                queue.append(index[key])
+
+        children = []
+        child_moves = []
+        terminal = []
+        while queue:
+            s = queue.popleft()
+            hx, ho, turn = states[s]
+            while len(children) <= s:
+                children.append(())
+                child_moves.append(())
+            if has_line(ho if turn == PLAYER_X else hx):
+                terminal.append(s)
+                continue
+            occupied = set(hx) | set(ho)
+            history = hx if turn == PLAYER_X else ho
+            if len(history) >= max_pieces:
+                history = history[1:]
+            kids = []
+            moves = []
+            for cell in range(cells):
+                if cell in occupied:
+                    continue
+                new_history = history + (cell,)
+                if turn == PLAYER_X:
+                    child = (new_history, ho, PLAYER_O)
+                else:
+                    child = (hx, new_history, PLAYER_X)
+                key, t = shell.canonical(*child)
+                slot = index.get(key)
+                if slot is None:
+                    perm = shell._perms[t]
+                    canon = (
+                        tuple(perm[c] for c in child[0]),
+                        tuple(perm[c] for c in child[1]),
+                        child[2],
+                    )
+                    slot = len(states)
+                    index[key] = slot
+                    states.append(canon)
+                    queue.append(slot)
+                kids.append(slot)
+                moves.append(cell)
+            children[s] = tuple(kids)
+            child_moves[s] = tuple(moves)
+
+        n = len(states)
+        while len(children) < n:
+            children.append(())
+            child_moves.append(())
+        parents = [[] for _ in range(n)]
+        for s, kids in enumerate(children):
+            for k in kids:
+                parents[k].append(s)
+
+        value = [DRAW] * n
+        dist = [0] * n
+        resolved = [False] * n
+        remaining = [len(kids) for kids in children]
+        queue = deque()
+        for s in terminal:
+            value[s] = LOSS
+            resolved[s] = True
+            queue.append(s)
+        while queue:
+            s = queue.popleft()
+            for p in parents[s]:
+                if resolved[p]:
+                    continue
+                if value[s] == LOSS:
+                    value[p] = WIN
+                    dist[p] = dist[s] + 1
+                    resolved[p] = True
+                    queue.append(p)
+                else:
+                    remaining[p] -= 1
+                    if remaining[p] == 0:
+                        value[p] = LOSS
+                        dist[p] = dist[s] + 1
+                        resolved[p] = True
+                        queue.append(p)
+
+        keys = array.array("q")
+        values = array.array("b")
+        distances = array.array("B")
+        best = array.array("b")
+        order = sorted(range(n), key=lambda s: shell._key(*states[s]))
+        for s in order:
+            keys.append(shell._key(*states[s]))
+            values.append(value[s])
+            distances.append(min(dist[s], 255))
+            best.append(cls._pick(s, value, dist, children, child_moves))
+        return cls(size, max_pieces, keys, values, distances, best)
+
+    @staticmethod
+    def _pick(s, value, dist, children, child_moves):
+        kids = children[s]
+        if not kids:
+            return -1
+        if value[s] == WIN:
+            candidates = [(dist[k], i) for i, k in enumerate(kids) if value[k] == LOSS]
+            return child_moves[s][min(candidates)[1]]
+        if value[s] == LOSS:
+            candidates = [(-dist[k], i) for i, k in enumerate(kids)]
+            return child_moves[s][min(candidates)[1]]
+        # Among drawing moves prefer the one that leaves the opponent the most losing replies.
+        candidates = []
+        for i, k in enumerate(kids):
+            if value[k] != DRAW:
+                continue
+            traps = sum(1 for g in children[k] if value[g] == WIN)
+            candidates.append((-traps, i))
+        return child_moves[s][min(candidates)[1]]
+
+    def save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, self.size, self.max_pieces, len(self.keys)))
+            self.keys.tofile(f)
+            self.values.tofile(f)
+            self.distances.tofile(f)
+            self.moves.tofile(f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, version, size, max_pieces, count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != TABLE_MAGIC or version != TABLE_VERSION:
+                raise ValueError(f"Unsupported solution table: {path}")
+            keys = array.array("q")
+            values = array.array("b")
+            distances = array.array("B")
+            moves = array.array("b")
+            keys.fromfile(f, count)
+            values.fromfile(f, count)
+            distances.fromfile(f, count)
+            moves.fromfile(f, count)
+        return cls(size, max_pieces, keys, values, distances, moves)
+
+    @classmethod
+    def load_or_build(cls, path, size, max_pieces):
+        try:
+            table = cls.load(path)
+            if table.matches(size, max_pieces):
+                return table
+        except (OSError, ValueError, EOFError, struct.error):
+            pass
+        table = cls.build(size, max_pieces)
+        try:
+            table.save(path)
+        except OSError:
+            pass
+        return table
@@ -0,0 +1,153 @@
+import asyncio
+import dataclasses
+import json
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from caro.config import CaroConfig
+from caro.core import PLAYER_X, PLAYER_O
+from caro.game import CaroGame
+
+StoredPlayer = namedtuple("StoredPlayer", "id bot mention display_name")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_key TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+def encode_key(key):
+    return str(key)
+
+
+def decode_key(text):
+    return int(text) if text.isdigit() else text
+
+
+def _player(player):
+    return {"id": player.id, "bot": bool(player.bot), "name": getattr(player, "display_name", str(player.id))}
+
+
+def serialize(game):
+    channel = game.game_channel
+    announce = game.announce_message
+    return {
+        "advanced": game.advanced,
+        "is_pvp": game.is_pvp,
+        "player_x": _player(game.player_x),
+        "player_o": _player(game.player_o),
+        "history_x": game.board.history(PLAYER_X),
+        "history_o": game.board.history(PLAYER_O),
+        "current_turn": game.current_turn,
+        "last_move": game.last_move,
+        "finished": game.finished,
+        "config": dataclasses.asdict(game.config),
+        "channel_id": channel.id if channel else None,
+        "message_id": game.message_id,
+        "board_channel_id": game.channel_id,
+        "guild_id": game.guild_id,
+        "match_id": game.match_id,
+        "announce": [announce.channel.id, announce.id] if announce else None,
+    }
+
+
+def restore(record):
+    players = [
+        StoredPlayer(p["id"], p["bot"], f"<@{p['id']}>", p["name"])
+        for p in (record["player_x"], record["player_o"])
+    ]
+    game = CaroGame(
+        players[0], players[1], is_pvp=record["is_pvp"],
+        config=CaroConfig.from_dict(record["config"]), advanced=record["advanced"]
+    )
+    for cell in record["history_x"]:
+        game.board.place(cell, PLAYER_X)
+    for cell in record["history_o"]:
+        game.board.place(cell, PLAYER_O)
+    game.current_turn = record["current_turn"]
+    game.last_move = record["last_move"]
+    game.message_id = record["message_id"]
+    game.channel_id = record.get("board_channel_id")
+    game.guild_id = record.get("guild_id")
+    game.match_id = record.get("match_id")
+    return game
+
+
+class GameStore:
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.writes = 0
+        self.batches = 0
+        self._conn = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def open(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def load_all(self):
+        rows = self._conn.execute("SELECT game_key, data FROM games").fetchall()
+        records = []
+        for key, data in rows:
+            record = json.loads(data)
+            if not record["finished"]:
+                records.append((decode_key(key), record))
+        return records
+
+    def save(self, key, game):
+        self._pending[encode_key(key)] = serialize(game)
+
+    def delete(self, key):
+        self._pending[encode_key(key)] = None
+
+    def _write(self, batch):
+        now = time.time()
+        upserts = [(key, json.dumps(record), now) for key, record in batch.items() if record is not None]
+        deletes = [(key,) for key, record in batch.items() if record is None]
+        with self._lock, self._conn:
+            if upserts:
+                self._conn.executemany(
+                    "INSERT INTO games (game_key, data, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(game_key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                    upserts
+                )
+            if deletes:
+                self._conn.executemany("DELETE FROM games WHERE game_key = ?", deletes)
+        self.writes += len(batch)
+        self.batches += 1
+
+    async def flush(self):
+        if not self._pending or self._conn is None:
+            return
+        batch = self._pending
+        self._pending = {}
+        await asyncio.to_thread(self._write, batch)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except sqlite3.Error as e:
+                print(f"Game store error: {e}")
+
+    def close(self):
+        if self._conn is None:
+            return
+        if self._pending:
+            batch = self._pending
+            self._pending = {}
+            self._write(batch)
+        with self._lock:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,82 @@
+from collections import OrderedDict
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+MATE_RANGE = 64
+
+
+def score_to_table(score, ply, win_score):
+    if score >= win_score - MATE_RANGE:
+        return score + ply
+    if score <= MATE_RANGE - win_score:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply, win_score):
+    if score >= win_score - MATE_RANGE:
+        return score - ply
+    if score <= MATE_RANGE - win_score:
+        return score + ply
+    return score
+
+
+class TranspositionTable:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.cutoffs = 0
+        self.stores = 0
+        self.replaced = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def new_search(self):
+        self.generation += 1
+
+    def probe(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def store(self, key, depth, flag, score, move):
+        entries = self._entries
+        old = entries.get(key)
+        if old is not None:
+            # Keep deeper results from the current search; anything older is stale.
+            if old[0] > depth and old[4] == self.generation:
+                return
+            entries.move_to_end(key)
+            self.replaced += 1
+        elif len(entries) >= self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+        entries[key] = (depth, flag, score, move, self.generation)
+        self.stores += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / probes if probes else 0.0,
+            "cutoffs": self.cutoffs,
+            "stores": self.stores,
+            "replaced": self.replaced,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+import discord
+
+
+class Scheduler:
+    def __init__(self):
+        self.fired = 0
+        self.cancelled = 0
+        self._handles = {}
+        self._tasks = set()
+
+    def call_later(self, delay, key, fn, *args):
+        loop = asyncio.get_running_loop()
+        handles = self._handles.setdefault(key, set())
+        handle = None
+
+        def fire():
+            handles.discard(handle)
+            if not handles and self._handles.get(key) is handles:
+                del self._handles[key]
+            self.fired += 1
+            task = loop.create_task(fn(*args))
+            self._tasks.add(task)
+            task.add_done_callback(self._done)
+
+        handle = loop.call_later(max(delay, 0), fire)
+        handles.add(handle)
+        return handle
+
+    def _done(self, task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Scheduled action error: {task.exception()!r}")
+
+    def cancel(self, key):
+        for handle in self._handles.pop(key, ()):
+            handle.cancel()
+            self.cancelled += 1
+
+    def pending(self):
+        return sum(len(handles) for handles in self._handles.values())
+
+    def shutdown(self):
+        for key in list(self._handles):
+            self.cancel(key)
+        for task in list(self._tasks):
+            task.cancel()
+
+
+class RateBucket:
+    __slots__ = ("limit", "period", "tokens", "stamp")
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+        self.tokens = limit
+        self.stamp = time.monotonic()
+
+    def delay(self):
+        now = time.monotonic()
+        self.tokens = min(self.limit, self.tokens + (now - self.stamp) * self.limit / self.period)
+        self.stamp = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) * self.period / self.limit
+
+    async def acquire(self):
+        while True:
+            wait = self.delay()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+
+class MessageUpdater:
+    def __init__(self, limit=5, period=5.0):
+        self.limit = limit
+        self.period = period
+        self.submitted = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.failed = 0
+        self._buckets = {}
+        self._pending = {}
+        self._workers = {}
+
+    def bucket(self, channel_id):
+        bucket = self._buckets.get(channel_id)
+        if bucket is None:
+            bucket = self._buckets[channel_id] = RateBucket(self.limit, self.period)
+        return bucket
+
+    def submit(self, message, render):
+        self.submitted += 1
+        if message.id in self._pending:
+            self.coalesced += 1
+        self._pending[message.id] = (message, render)
+        if message.id not in self._workers:
+            self._workers[message.id] = asyncio.create_task(self._drain(message.id))
+
+    async def _drain(self, message_id):
+        try:
+            while message_id in self._pending:
+                message, _ = self._pending[message_id]
+                await self.bucket(message.channel.id).acquire()
+                message, render = self._pending.pop(message_id)
+                try:
+                    await message.edit(**render())
+                    self.sent += 1
+                except discord.NotFound:
+                    self._pending.pop(message_id, None)
+                except discord.HTTPException as e:
+                    self.failed += 1
+                    print(f"Board update error: {e}")
+        finally:
+            self._workers.pop(message_id, None)
+            if not self._workers:
+                self.prune()
+
+    def prune(self):
+        now = time.monotonic()
+        for channel_id, bucket in list(self._buckets.items()):
+            if now - bucket.stamp > bucket.period:
+                del self._buckets[channel_id]
+
+    async def flush(self):
+        workers = list(self._workers.values())
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def shutdown(self):
+        for worker in self._workers.values():
+            worker.cancel()
+        self._workers.clear()
+        self._pending.clear()
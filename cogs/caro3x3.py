@@ -3,228 +3,69 @@ from discord.ext import commands
 from discord import app_commands
 import random
 import asyncio
+import io
 import os
-import json
+import sqlite3
+import time
+
+from caro import ipc, mcts, metrics
+from caro.channel_pool import ChannelPool
+from caro.config import ConfigStore
+from caro.core import EMPTY, PLAYER_X, PLAYER_O
+from caro.executor import EngineExecutor, SearchCancelled
+from caro.game import CaroGame, mcts_snapshot, search_snapshot, warm_caches
+from caro.match_stats import MatchStats
+from caro.matchlog import MatchLog
+from caro.ponder import Ponderer
+from caro.registry import GameRegistry
+from caro.render import BoardRenderer, available as renderer_available
+from caro.store import GameStore, restore
+from caro.updates import MessageUpdater, Scheduler
 
 CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "caro_config.json")
-_config_cache = {}
-_config_mtime = 0
-
-def load_config():
-    global _config_cache, _config_mtime
-    try:
-        mt = os.path.getmtime(CONFIG_PATH)
-    except OSError:
-        return _config_cache
-    if mt != _config_mtime:
-        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-            _config_cache = json.load(f)
-        _config_mtime = mt
-    return _config_cache
+BASE_DIR = os.path.dirname(CONFIG_PATH)
+TABLE_PATH = os.path.join(BASE_DIR, "caro_table.bin")
+config_store = ConfigStore(CONFIG_PATH)
+CLUSTER = int(os.getenv("CARO_CLUSTER", "0"))
 
 def cfg(key):
-    return load_config()[key]
-
-EMPTY = 0
-PLAYER_X = 1
-PLAYER_O = 2
-
-
-class CaroGame:
-    def __init__(self, player_x, player_o, is_pvp=True):
-        self.board = [[EMPTY] * cfg("board_size") for _ in range(cfg("board_size"))]
-        self.player_x = player_x
-        self.player_o = player_o
-        self.is_pvp = is_pvp
-        self.current_turn = PLAYER_X
-        self.history_x = []
-        self.history_o = []
-        self.finished = False
-        self.game_channel = None
-        self.announce_message = None
-        self.winner = None
-
-    def current_player(self):
-        return self.player_x if self.current_turn == PLAYER_X else self.player_o
-
-    def get_history(self, player):
-        return self.history_x if player == PLAYER_X else self.history_o
-
-    def place(self, row, col):
-        if self.board[row][col] != EMPTY:
-            return False
-        history = self.get_history(self.current_turn)
-        if len(history) >= cfg("max_pieces"):
-            old_r, old_c = history.pop(0)
-            self.board[old_r][old_c] = EMPTY
-        self.board[row][col] = self.current_turn
-        history.append((row, col))
-        if self.check_win(self.current_turn):
-            self.finished = True
-            self.winner = self.current_turn
-        else:
-            self.current_turn = PLAYER_O if self.current_turn == PLAYER_X else PLAYER_X
-        return True
+    return getattr(config_store.snapshot, key)
 
-    def check_win(self, player):
-        b = self.board
-        size = cfg("board_size")
-        for i in range(size):
-            if all(b[i][c] == player for c in range(size)):
-                return True
-            if all(b[r][i] == player for r in range(size)):
-                return True
-        if all(b[i][i] == player for i in range(size)):
-            return True
-        if all(b[i][size - 1 - i] == player for i in range(size)):
-            return True
-        return False
-
-    def ai_move(self):
-        config = load_config()
-        size = config["board_size"]
-        if config["bot_mistake_enabled"] and random.randint(1, 100) <= config["bot_mistake_chance"]:
-            empty_cells = [
-                (r, c)
-                for r in range(size)
-                for c in range(size)
-                if self.board[r][c] == EMPTY
-            ]
-            if empty_cells:
-                return random.choice(empty_cells)
-
-        best_score = float('-inf')
-        best_move = None
-        alpha = float('-inf')
-        beta = float('inf')
-        for r in range(size):
-            for c in range(size):
-                if self.board[r][c] == EMPTY:
-                    removed = None
-                    if len(self.history_o) >= config["max_pieces"]:
-                        old_r, old_c = self.history_o[0]
-                        removed = (old_r, old_c)
-                        self.board[old_r][old_c] = EMPTY
-                        self.history_o.pop(0)
-                    self.board[r][c] = PLAYER_O
-                    self.history_o.append((r, c))
-                    score = self.minimax(False, config["minimax_depth"], alpha, beta)
-                    self.history_o.pop()
-                    self.board[r][c] = EMPTY
-                    if removed:
-                        self.board[removed[0]][removed[1]] = PLAYER_O
-                        self.history_o.insert(0, removed)
-                    if score > best_score:
-                        best_score = score
-                        best_move = (r, c)
-                    alpha = max(alpha, best_score)
-        return best_move
-
-    def minimax(self, is_ai_turn, depth, alpha, beta):
-        md = cfg("minimax_depth")
-        if self.check_win(PLAYER_O):
-            return 10 - (md + 3 - depth)
-        if self.check_win(PLAYER_X):
-            return -10 + (md + 3 - depth)
-        if depth <= 0:
-            return self.evaluate()
-
-        player = PLAYER_O if is_ai_turn else PLAYER_X
-        history = self.get_history(player)
-
-        size = cfg("board_size")
-        mp = cfg("max_pieces")
-        if is_ai_turn:
-            best = float('-inf')
-            for r in range(size):
-                for c in range(size):
-                    if self.board[r][c] == EMPTY:
-                        removed = None
-                        if len(history) >= mp:
-                            old_r, old_c = history[0]
-                            removed = (old_r, old_c)
-                            self.board[old_r][old_c] = EMPTY
-                            history.pop(0)
-                        self.board[r][c] = player
-                        history.append((r, c))
-                        best = max(best, self.minimax(False, depth - 1, alpha, beta))
-                        history.pop()
-                        self.board[r][c] = EMPTY
-                        if removed:
-                            self.board[removed[0]][removed[1]] = player
-                            history.insert(0, removed)
-                        alpha = max(alpha, best)
-                        if beta <= alpha:
-                            return best
-            return best
-        else:
-            best = float('inf')
-            for r in range(size):
-                for c in range(size):
-                    if self.board[r][c] == EMPTY:
-                        removed = None
-                        if len(history) >= mp:
-                            old_r, old_c = history[0]
-                            removed = (old_r, old_c)
-                            self.board[old_r][old_c] = EMPTY
-                            history.pop(0)
-                        self.board[r][c] = player
-                        history.append((r, c))
-                        best = min(best, self.minimax(True, depth - 1, alpha, beta))
-                        history.pop()
-                        self.board[r][c] = EMPTY
-                        if removed:
-                            self.board[removed[0]][removed[1]] = player
-                            history.insert(0, removed)
-                        beta = min(beta, best)
-                        if beta <= alpha:
-                            return best
-            return best
-
-    def evaluate(self):
-        lines = []
-        size = cfg("board_size")
-        for i in range(size):
-            lines.append([(i, c) for c in range(size)])
-            lines.append([(r, i) for r in range(size)])
-        lines.append([(i, i) for i in range(size)])
-        lines.append([(i, size - 1 - i) for i in range(size)])
-
-        score = 0
-        for line in lines:
-            values = [self.board[r][c] for r, c in line]
-            ai_count = values.count(PLAYER_O)
-            player_count = values.count(PLAYER_X)
-            if ai_count > 0 and player_count == 0:
-                score += ai_count
-            elif player_count > 0 and ai_count == 0:
-                score -= player_count
-        return score
+BOARD_FILENAME = "board.png"
+
+NUMBER_EMOJI = ("1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣", "🔟")
+
+def warm_engine_caches():
+    warm_caches(config_store.snapshot, TABLE_PATH)
 
 
 class BoardView(discord.ui.View):
-    def __init__(self, game, cog, game_key):
-        super().__init__(timeout=cfg("game_timeout"))
+    def __init__(self, game, cog, game_key, persistent=False):
+        super().__init__(timeout=None if persistent else game.config.game_timeout)
         self.game = game
         self.cog = cog
         self.game_key = game_key
+        self.message = None
+        game.view = self
         self.build_buttons()
 
     def build_buttons(self):
         self.clear_items()
+        board = self.game.board
+        size = board.size
         will_remove_x = None
         will_remove_o = None
         if not self.game.finished:
             turn = self.game.current_turn
-            history = self.game.get_history(turn)
-            if len(history) >= cfg("max_pieces"):
+            oldest = board.oldest(turn)
+            if oldest >= 0:
                 if turn == PLAYER_X:
-                    will_remove_x = history[0]
+                    will_remove_x = divmod(oldest, size)
                 else:
-                    will_remove_o = history[0]
-        for r in range(cfg("board_size")):
-            for c in range(cfg("board_size")):
-                val = self.game.board[r][c]
+                    will_remove_o = divmod(oldest, size)
+        for r in range(size):
+            for c in range(size):
+                val = board.get(r, c)
                 if val == PLAYER_X:
                     if will_remove_x == (r, c):
                         label = "❌"
@@ -257,49 +98,147 @@ class BoardView(discord.ui.View):
 
     def make_callback(self, row, col):
         async def callback(interaction: discord.Interaction):
-            if interaction.user.id != self.game.current_player().id:
-                await interaction.response.send_message("Chưa đến lượt bạn!", ephemeral=True)
-                return
-
-            self.game.place(row, col)
-            self.build_buttons()
-            embed = self.cog.make_embed(self.game)
-            await interaction.response.edit_message(embed=embed, view=self)
-
-            if not self.game.finished and not self.game.is_pvp and self.game.current_turn == PLAYER_O:
-                delay = cfg("bot_move_delay")
-                if delay > 0:
-                    await asyncio.sleep(delay)
-                ai_pos = self.game.ai_move()
-                if ai_pos:
-                    self.game.place(ai_pos[0], ai_pos[1])
-                self.build_buttons()
-                embed = self.cog.make_embed(self.game)
-                await interaction.message.edit(embed=embed, view=self)
-
-            if self.game.finished:
-                if self.game.game_channel:
-                    if self.game.announce_message:
-                        result_embed = self.cog.make_embed(self.game)
-                        try:
-                            await self.game.announce_message.edit(embed=result_embed)
-                        except discord.NotFound:
-                            pass
-                    await asyncio.sleep(cfg("channel_delete_delay"))
-                    try:
-                        await self.game.game_channel.delete()
-                    except discord.NotFound:
-                        pass
-                self.cog.games.pop(self.game_key, None)
+            with metrics.INTERACTION_SECONDS.time(component="board"):
+                await self.play(interaction, row, col)
 
         return callback
 
+    async def play(self, interaction, row, col):
+        if self.game.finished or self.cog.games.get(self.game_key) is not self.game:
+            await interaction.response.send_message("Trận đấu đã kết thúc!", ephemeral=True)
+            return
+        if interaction.user.id != self.game.current_player().id:
+            await interaction.response.send_message("Chưa đến lượt bạn!", ephemeral=True)
+            return
+
+        if not self.game.place(row, col):
+            await interaction.response.send_message("Ô này đã có quân!", ephemeral=True)
+            return
+        self.cog.games.touch(self.game_key)
+        self.message = interaction.message
+        result = None
+        taken = self.bot_to_move() and self.game.config.bot_move_delay <= 0
+        if taken:
+            result = self.cog.ponder.take(self.game_key, self.game)
+            if result is not None:
+                self.apply_bot_move(result, "ponder")
+        await interaction.response.edit_message(**self.payload())
+
+        if self.game.finished:
+            self.cog.finish_game(self.game_key, self.game)
+        elif self.bot_to_move():
+            self.cog.scheduler.call_later(self.game.config.bot_move_delay, self.game_key, self.bot_turn, taken)
+        elif result is not None:
+            self.cog.ponder.start(self.game_key, self.game)
+
+    def bot_to_move(self):
+        return not self.game.finished and not self.game.is_pvp and self.game.current_turn == PLAYER_O
+
+    def payload(self):
+        self.build_buttons()
+        embed = self.cog.make_embed(self.game)
+        return dict(embed=embed, view=self, **self.cog.board_files(self.game, self.game_key, edit=True))
+
+    def apply_bot_move(self, result, source):
+        game = self.game
+        metrics.record_search(result, game.engine_name(), "gomoku" if game.advanced else "rolling", source)
+        game.last_search = result
+        if result.move:
+            self.game.place(result.move[0], result.move[1])
+
+    async def bot_turn(self, taken=False):
+        game = self.game
+        if not self.bot_to_move() or self.cog.games.get(self.game_key) is not game:
+            return
+        result = None if taken else self.cog.ponder.take(self.game_key, game)
+        source = "ponder"
+        if result is None:
+            source = "search"
+            try:
+                result = await self.cog.search_game(self.game_key, game)
+            except SearchCancelled:
+                return
+            except Exception as e:
+                print(f"Bot search failed, playing fallback move: {type(e).__name__}: {e}")
+                result = game.fallback_move()
+                source = "fallback"
+            if game.finished or self.cog.games.get(self.game_key) is not game:
+                return
+        self.apply_bot_move(result, source)
+        self.cog.updater.submit(self.message, self.payload)
+        if game.finished:
+            self.cog.finish_game(self.game_key, game)
+        else:
+            self.cog.ponder.start(self.game_key, game)
+
     async def on_timeout(self):
-        self.game.finished = True
+        if self.cog.games.get(self.game_key) is not self.game:
+            return
+        self.cog.games.pop(self.game_key)
+        self.cog.evict_game(self.game_key, self.game)
         for item in self.children:
             item.disabled = True
 
 
+class GomokuView(BoardView):
+    def __init__(self, game, cog, game_key, persistent=False):
+        self.selected_row = None
+        self.selected_col = None
+        super().__init__(game, cog, game_key, persistent)
+
+    def build_buttons(self):
+        self.clear_items()
+        self.selected_row = None
+        self.selected_col = None
+        size = self.game.board.size
+        disabled = self.game.finished
+        row_select = discord.ui.Select(
+            placeholder="Chọn hàng",
+            options=[discord.SelectOption(label=f"Hàng {r + 1}", value=str(r)) for r in range(size)],
+            disabled=disabled,
+            row=0,
+            custom_id=f"caro_{self.game_key}_row"
+        )
+        row_select.callback = self.make_select_callback(row_select, "selected_row")
+        col_select = discord.ui.Select(
+            placeholder="Chọn cột",
+            options=[discord.SelectOption(label=f"Cột {c + 1}", value=str(c)) for c in range(size)],
+            disabled=disabled,
+            row=1,
+            custom_id=f"caro_{self.game_key}_col"
+        )
+        col_select.callback = self.make_select_callback(col_select, "selected_col")
+        play_button = discord.ui.Button(
+            label="Đánh",
+            style=discord.ButtonStyle.green,
+            disabled=disabled,
+            row=2,
+            custom_id=f"caro_{self.game_key}_play"
+        )
+        play_button.callback = self.play_selected
+        self.add_item(row_select)
+        self.add_item(col_select)
+        self.add_item(play_button)
+
+    def make_select_callback(self, select, attr):
+        async def callback(interaction: discord.Interaction):
+            with metrics.INTERACTION_SECONDS.time(component="select"):
+                if interaction.user.id != self.game.current_player().id:
+                    await interaction.response.send_message("Chưa đến lượt bạn!", ephemeral=True)
+                    return
+                setattr(self, attr, int(select.values[0]))
+                await interaction.response.defer()
+
+        return callback
+
+    @metrics.timed(metrics.INTERACTION_SECONDS, component="gomoku")
+    async def play_selected(self, interaction: discord.Interaction):
+        if self.selected_row is None or self.selected_col is None:
+            await interaction.response.send_message("Hãy chọn hàng và cột trước!", ephemeral=True)
+            return
+        await self.play(interaction, self.selected_row, self.selected_col)
+
+
 class ChallengeView(discord.ui.View):
     def __init__(self, challenger, challenged, cog):
         super().__init__(timeout=cfg("challenge_timeout"))
@@ -308,6 +247,7 @@ class ChallengeView(discord.ui.View):
         self.cog = cog
 
     @discord.ui.button(label="Chấp nhận", style=discord.ButtonStyle.green, emoji="✅")
+    @metrics.timed(metrics.INTERACTION_SECONDS, component="accept")
     async def accept(self, interaction: discord.Interaction, button: discord.ui.Button):
         if interaction.user.id != self.challenged.id:
             await interaction.response.send_message("Không phải lượt của bạn!", ephemeral=True)
@@ -320,29 +260,20 @@ class ChallengeView(discord.ui.View):
         )
 
         guild = interaction.guild
-        category = None
-        if cfg("category_id"):
-            category = guild.get_channel(int(cfg("category_id")))
-        if not category:
-            category = await guild.create_category("Tic-Tac-Toe")
-
-        overwrites = {
-            guild.default_role: discord.PermissionOverwrite(view_channel=True, send_messages=False),
-            guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True),
-            self.challenger: discord.PermissionOverwrite(view_channel=True, send_messages=True),
-            self.challenged: discord.PermissionOverwrite(view_channel=True, send_messages=True),
-        }
         channel_name = f"{self.challenger.display_name}-vs-{self.challenged.display_name}"
-        game_channel = await category.create_text_channel(channel_name, overwrites=overwrites)
+        game_channel = await self.cog.channels.acquire(guild, channel_name, [self.challenger, self.challenged])
 
-        game = CaroGame(self.challenged, self.challenger, is_pvp=True)
+        game = CaroGame(self.challenged, self.challenger, is_pvp=True, config=config_store.snapshot)
         game.game_channel = game_channel
+        game.channel_id = game_channel.id
+        game.guild_id = guild.id
         key = game_channel.id
-        self.cog.games[key] = game
+        self.cog.games.add(key, game)
 
         board_view = BoardView(game, self.cog, key)
         embed = self.cog.make_embed(game)
-        await game_channel.send(embed=embed, view=board_view)
+        message = await game_channel.send(embed=embed, view=board_view, **self.cog.board_files(game, key))
+        game.message_id = message.id
 
         announce_msg = await interaction.followup.send(
             embed=discord.Embed(
@@ -352,8 +283,10 @@ class ChallengeView(discord.ui.View):
             )
         )
         game.announce_message = announce_msg
+        self.cog.track_game(key, game)
 
     @discord.ui.button(label="Từ chối", style=discord.ButtonStyle.red, emoji="❌")
+    @metrics.timed(metrics.INTERACTION_SECONDS, component="decline")
     async def decline(self, interaction: discord.Interaction, button: discord.ui.Button):
         if interaction.user.id != self.challenged.id:
             await interaction.response.send_message("Không phải lượt của bạn!", ephemeral=True)
@@ -371,9 +304,375 @@ class ChallengeView(discord.ui.View):
 class CaroCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.games = {}
+        self.games = GameRegistry(cfg("game_ttl"), cfg("registry_max_games"), on_evict=self.evict_game)
+        self.engine = EngineExecutor(cfg("engine_executor"), cfg("engine_workers"), initializer=warm_engine_caches)
+        self.ponder = Ponderer(self.engine)
+        self.renderer = BoardRenderer(cfg("render_cell_px")) if renderer_available() else None
+        self.store = GameStore(os.path.join(BASE_DIR, cfg("store_path")), cfg("store_flush_interval"))
+        self.matches = MatchLog(os.path.join(BASE_DIR, cfg("match_log_dir")), CLUSTER, cfg("match_log_flush_interval"))
+        self.match_stats = MatchStats(os.path.join(BASE_DIR, cfg("match_stats_path")))
+        self._leaderboard = None
+        self._leaderboard_at = 0.0
+        self._config_watch = None
+        self._store_task = None
+        self._match_task = None
+        self._stats_task = None
+        self._sweeper = None
+        self.channels = ChannelPool(cfg("channel_pool_size"), cfg("category_id"))
+        self.scheduler = Scheduler()
+        self.updater = MessageUpdater(cfg("edit_rate_limit"), cfg("edit_rate_period"))
+        self.metrics_server = None
+        if cfg("metrics_port"):
+            self.metrics_server = metrics.MetricsServer(cfg("metrics_host"), cfg("metrics_port") + CLUSTER)
+        self.ipc_server = None
+        if cfg("ipc_dir") and ipc.supported():
+            self.ipc_server = ipc.IPCServer(
+                ipc.socket_path(cfg("ipc_dir"), CLUSTER),
+                {"stats": self.local_stats, "games": self.local_games},
+            )
+        self._loop_lag = None
+        self._warm = None
+        self.register_gauges()
+
+    async def cog_load(self):
+        self._config_watch = asyncio.create_task(config_store.watch())
+        try:
+            self.store.open()
+            restored = self.restore_games()
+            print(f"Restored {len(restored)} games.")
+            asyncio.create_task(self.resolve_channels(restored))
+        except Exception as e:
+            print(f"Game store error: {e}")
+        self._store_task = asyncio.create_task(self.store.run())
+        self._match_task = asyncio.create_task(self.matches.run())
+        try:
+            self.match_stats.open()
+            if CLUSTER == 0:
+                self._stats_task = asyncio.create_task(self.ingest_matches())
+        except sqlite3.Error as e:
+            print(f"Match stats error: {e}")
+        self._sweeper = asyncio.create_task(self.games.run(cfg("registry_sweep_interval")))
+        self._loop_lag = asyncio.create_task(metrics.watch_loop_lag(cfg("loop_lag_interval")))
+        if self.metrics_server:
+            try:
+                await self.metrics_server.start()
+            except OSError as e:
+                print(f"Metrics server error: {e}")
+        if self.ipc_server:
+            try:
+                await self.ipc_server.start()
+            except OSError as e:
+                print(f"IPC server error: {e}")
+
+    async def cog_unload(self):
+        if self._config_watch:
+            self._config_watch.cancel()
+        if self._store_task:
+            self._store_task.cancel()
+        if self._match_task:
+            self._match_task.cancel()
+        if self._stats_task:
+            self._stats_task.cancel()
+        if self._sweeper:
+            self._sweeper.cancel()
+        if self._loop_lag:
+            self._loop_lag.cancel()
+        if self._warm:
+            self._warm.cancel()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        if self.ipc_server:
+            await self.ipc_server.stop()
+        self.ponder.shutdown()
+        self.scheduler.shutdown()
+        self.updater.shutdown()
+        self.channels.shutdown()
+        self.engine.shutdown()
+        try:
+            await self.store.flush()
+            self.store.close()
+        except Exception as e:
+            print(f"Game store error: {e}")
+        try:
+            self.matches.close()
+        except OSError as e:
+            print(f"Match log error: {e}")
+        self.match_stats.close()
+
+    def owns_guild(self, guild_id):
+        shard_ids = self.bot.shard_ids
+        shard_count = self.bot.shard_count
+        if shard_ids is None or not shard_count:
+            return True
+        return ((guild_id or 0) >> 22) % shard_count in shard_ids
+
+    def local_stats(self):
+        games = self.games.stats()
+        return {
+            "cluster": CLUSTER,
+            "pid": os.getpid(),
+            "shards": sorted(self.bot.shard_ids or []),
+            "guilds": len(self.bot.guilds),
+            "games": games["games"],
+            "active": games["active"],
+            "searches": metrics.SEARCH_SECONDS.merged()[1],
+            "search_p95_ms": round(metrics.SEARCH_SECONDS.quantile(0.95) * 1000, 1),
+            "rest_requests": metrics.REST_REQUESTS.total(),
+            "rest_429": metrics.REST_REQUESTS.total(status=429),
+            "loop_lag_max_ms": round(metrics.LOOP_LAG_MAX.values.get((), 0) * 1000, 1),
+        }
+
+    def local_games(self, guild_id=None):
+        keys = self.games.keys_by_guild(guild_id) if guild_id is not None else list(self.games)
+        games = []
+        for key in keys:
+            game = self.games.get(key)
+            if game is not None and not game.finished:
+                games.append({
+                    "key": key,
+                    "guild_id": game.guild_id,
+                    "channel_id": game.channel_id,
+                    "mode": "pvp" if game.is_pvp else "gomoku" if game.advanced else "bot",
+                })
+        return games
+
+    def register_gauges(self):
+        registry = metrics.REGISTRY
+        registry.gauge("caro_games", "Games held by the registry", lambda: [
+            ({"state": "tracked"}, len(self.games)),
+            ({"state": "active"}, self.games.stats()["active"]),
+        ])
+        registry.gauge("caro_engine_pending", "Searches queued or running on the engine pool", self.engine.pending)
+        registry.gauge("caro_ponder_results", "Pondered replies taken or missed", lambda: [
+            ({"result": "hit"}, self.ponder.hits),
+            ({"result": "miss"}, self.ponder.misses),
+        ])
+        registry.gauge("caro_board_updates", "Board message edits by outcome", lambda: [
+            ({"outcome": name}, getattr(self.updater, name))
+            for name in ("submitted", "sent", "coalesced", "failed")
+        ])
+        registry.gauge("caro_scheduled_actions", "Delayed actions waiting to run", self.scheduler.pending)
+        registry.gauge("caro_channel_pool", "Game channel pool counters", lambda: [
+            ({"state": "idle"}, self.channels.idle_count()),
+            ({"state": "created"}, self.channels.created),
+            ({"state": "reused"}, self.channels.reused),
+            ({"state": "recycled"}, self.channels.recycled),
+            ({"state": "renamed"}, self.channels.renamed),
+            ({"state": "deleted"}, self.channels.deleted),
+        ])
+        registry.gauge("caro_match_log", "Match log records and bytes written", lambda: [
+            ({"counter": "records"}, self.matches.records),
+            ({"counter": "bytes"}, self.matches.bytes_written),
+            ({"counter": "ingested"}, self.match_stats.ingested),
+        ])
+
+    async def interaction_check(self, interaction):
+        interaction.extras["caro_started"] = time.perf_counter()
+        return True
+
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction, command):
+        started = interaction.extras.get("caro_started")
+        if started is not None:
+            metrics.COMMAND_SECONDS.observe(time.perf_counter() - started, command=command.qualified_name)
+
+    async def cog_app_command_error(self, interaction, error):
+        command = interaction.command.qualified_name if interaction.command else "unknown"
+        metrics.COMMAND_ERRORS.inc(command=command)
+        started = interaction.extras.get("caro_started")
+        if started is not None:
+            metrics.COMMAND_SECONDS.observe(time.perf_counter() - started, command=command)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.channels.warm(self.bot.guilds)
+        if self._warm is None:
+            self._warm = asyncio.create_task(self.warm_engine())
+
+    async def warm_engine(self):
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(warm_engine_caches)
+            await self.engine.warm()
+        except Exception as e:
+            print(f"Engine warm-up error: {e}")
+            return
+        print(f"Engine warmed in {time.perf_counter() - started:.2f}s")
+
+    def track_game(self, key, game):
+        if game.match_id is None:
+            self.matches.start(game)
+        game.listener = lambda g: self.record_move(key, g)
+        self.store.save(key, game)
+
+    def record_move(self, key, game):
+        self.matches.move(game)
+        self.store.save(key, game)
+
+    async def ingest_matches(self):
+        directory = self.matches.directory
+        while True:
+            await asyncio.sleep(cfg("stats_ingest_interval"))
+            try:
+                await self.matches.flush()
+                await asyncio.to_thread(self.match_stats.ingest, directory)
+            except (OSError, ValueError, sqlite3.Error) as e:
+                print(f"Match stats error: {e}")
+
+    async def leaderboard(self):
+        now = time.monotonic()
+        if self._leaderboard is None or now - self._leaderboard_at >= cfg("leaderboard_cache_ttl"):
+            self._leaderboard = await asyncio.to_thread(self.match_stats.leaderboard, cfg("leaderboard_size"))
+            self._leaderboard_at = now
+        return self._leaderboard
+
+    def restore_games(self):
+        restored = []
+        for key, record in self.store.load_all():
+            if not self.owns_guild(record["guild_id"]):
+                continue
+            game = restore(record)
+            if record["channel_id"]:
+                game.game_channel = self.bot.get_partial_messageable(record["channel_id"])
+            if record["announce"]:
+                channel_id, message_id = record["announce"]
+                game.announce_message = self.bot.get_partial_messageable(channel_id).get_partial_message(message_id)
+            self.games.add(key, game)
+            self.track_game(key, game)
+            view_cls = GomokuView if game.advanced else BoardView
+            view = view_cls(game, self, key, persistent=True)
+            self.bot.add_view(view, message_id=game.message_id)
+            if view.bot_to_move() and game.channel_id:
+                view.message = self.bot.get_partial_messageable(game.channel_id).get_partial_message(game.message_id)
+                self.scheduler.call_later(0, key, view.bot_turn)
+            restored.append((game, record["channel_id"]))
+        return restored
+
+    async def resolve_channels(self, restored):
+        await self.bot.wait_until_ready()
+        for game, channel_id in restored:
+            if channel_id:
+                channel = self.bot.get_channel(channel_id)
+                if channel:
+                    game.game_channel = channel
+
+    def evict_game(self, key, game):
+        # A game that already has a result keeps it; only unfinished ones count as abandoned.
+        self.matches.end(game, abandoned=not game.finished)
+        game.finished = True
+        self.release_game(key)
+        self.stop_view(game)
+        if game.game_channel:
+            self.scheduler.call_later(game.config.channel_delete_delay, key, self.channels.release, game.game_channel)
+
+    def finish_game(self, key, game):
+        self.matches.end(game)
+        self.release_game(key)
+        self.stop_view(game)
+        if self.games.get(key) is game:
+            self.games.pop(key)
+        if game.game_channel:
+            if game.announce_message:
+                self.updater.submit(game.announce_message, lambda: {"embed": self.make_status_embed(game)})
+            self.scheduler.call_later(game.config.channel_delete_delay, key, self.channels.release, game.game_channel)
+
+    def stop_view(self, game):
+        if game.view is not None:
+            game.view.stop()
+
+    def release_game(self, key):
+        self.store.delete(key)
+        self.scheduler.cancel(key)
+        self.ponder.cancel(key)
+        self.engine.cancel(key)
+        if self.renderer:
+            self.renderer.forget(key)
+
+    async def search_game(self, key, game):
+        budget = game.config.engine_timeout
+        if game.engine_name() != "mcts" or self.engine.mode == "inline":
+            return await self.engine.run(key, search_snapshot, game.snapshot(), budget, timeout=budget + 1)
+        mistake = game.mistake()
+        if mistake:
+            return mistake
+        move_budget = game.move_budget(budget)
+        snapshot = game.snapshot()
+        # More trees than engine workers would queue behind each other and stretch the move past its budget.
+        workers = min(game.config.mcts_workers or self.engine.workers, self.engine.workers)
+        calls = [(snapshot, move_budget, random.getrandbits(32)) for _ in range(workers)]
+        stats = await self.engine.run_many(key, mcts_snapshot, calls, timeout=move_budget + 1)
+        return mcts.merge(stats, game.board.size)
+
+    def uses_image(self, game):
+        mode = game.config.board_renderer
+        if mode == "text" or self.renderer is None:
+            return False
+        return mode == "image" or game.advanced
+
+    def board_files(self, game, key, edit=False):
+        if not self.uses_image(game):
+            return {}
+        highlights = set()
+        if game.last_move is not None:
+            highlights.add(game.last_move)
+        if not game.finished and not game.advanced:
+            oldest = game.board.oldest(game.current_turn)
+            if oldest >= 0:
+                highlights.add(oldest)
+        png = self.renderer.render(key, game.board, highlights)
+        file = discord.File(io.BytesIO(png), filename=BOARD_FILENAME)
+        return {"attachments": [file]} if edit else {"file": file}
+
+    async def start_bot_game(self, interaction, advanced):
+        if self.find_bot_game(interaction.user.id)[0] is not None:
+            await interaction.response.send_message("❌ Bạn đang có trận đấu với bot!", ephemeral=True)
+            return
+
+        key = f"bot_{interaction.guild_id or 0}_{interaction.user.id}"
+        game = CaroGame(interaction.user, self.bot.user, is_pvp=False, config=config_store.snapshot, advanced=advanced)
+        game.channel_id = interaction.channel_id
+        game.guild_id = interaction.guild_id
+        bot_first = game.config.bot_goes_first
+        if bot_first == "random":
+            bot_first = random.choice([True, False])
+        if bot_first:
+            game.current_turn = PLAYER_O
+            size = game.board.size
+            if advanced:
+                game.place(size // 2, size // 2)
+            else:
+                game.place(random.randint(0, size - 1), random.randint(0, size - 1))
+        self.games.add(key, game)
+
+        view_cls = GomokuView if advanced else BoardView
+        board_view = view_cls(game, self, key)
+        embed = self.make_embed(game)
+        response = await interaction.response.send_message(embed=embed, view=board_view, **self.board_files(game, key))
+        game.message_id = response.message_id
+        self.track_game(key, game)
+        self.ponder.start(key, game)
+
+    def find_bot_game(self, user_id):
+        return self.games.find(self.games.keys_by_user(user_id), lambda g: not g.is_pvp)
 
     def make_embed(self, game):
+        embed = self.make_status_embed(game)
+        if self.uses_image(game):
+            embed.set_image(url=f"attachment://{BOARD_FILENAME}")
+        elif game.advanced:
+            embed.description = f"{embed.description}\n\n{self.render_board(game)}"
+        return embed
+
+    def render_board(self, game):
+        board = game.board
+        size = board.size
+        symbols = {EMPTY: game.config.emoji_empty, PLAYER_X: game.config.emoji_x, PLAYER_O: game.config.emoji_o}
+        lines = ["⬛" + "".join(NUMBER_EMOJI[:size])]
+        for r in range(size):
+            lines.append(NUMBER_EMOJI[r] + "".join(symbols[board.get(r, c)] for c in range(size)))
+        return "\n".join(lines)
+
+    def make_status_embed(self, game):
         if game.finished:
             if game.winner:
                 winner = game.player_x if game.winner == PLAYER_X else game.player_o
@@ -394,7 +693,7 @@ class CaroCog(commands.Cog):
         current = game.current_player()
         current_name = "AI" if current.bot else current.mention
         return discord.Embed(
-            title="🎮 Tic-Tac-Toe",
+            title="🎮 Gomoku" if game.advanced else "🎮 Tic-Tac-Toe",
             description=f"Lượt: {current_name} ({player_emoji})",
             color=discord.Color.green() if not game.is_pvp else discord.Color.gold()
         )
@@ -411,8 +710,8 @@ class CaroCog(commands.Cog):
             await interaction.response.send_message("❌ Không thể tự thách đấu!", ephemeral=True)
             return
 
-        key = interaction.channel_id
-        if key in self.games and not self.games[key].finished:
+        key, _ = self.games.find(self.games.keys_by_channel(interaction.channel_id), lambda g: g.is_pvp)
+        if key is not None:
             await interaction.response.send_message("❌ Kênh này đang có trận đấu!", ephemeral=True)
             return
 
@@ -427,43 +726,127 @@ class CaroCog(commands.Cog):
 
     @caro_group.command(name="bot", description="Chơi với AI")
     async def caro_bot(self, interaction: discord.Interaction):
-        key = f"bot_{interaction.user.id}"
-        if key in self.games and not self.games[key].finished:
-            await interaction.response.send_message("❌ Bạn đang có trận đấu với bot!", ephemeral=True)
+        await self.start_bot_game(interaction, advanced=False)
+
+    @caro_group.command(name="gomoku", description="Chơi Gomoku bàn cờ lớn với AI")
+    async def caro_gomoku(self, interaction: discord.Interaction):
+        await self.start_bot_game(interaction, advanced=True)
+
+    @caro_group.command(name="stats", description="Thống kê hiệu năng (quản trị viên)")
+    async def caro_stats(self, interaction: discord.Interaction):
+        permissions = getattr(interaction.user, "guild_permissions", None)
+        if permissions is None or not permissions.administrator:
+            await interaction.response.send_message("❌ Chỉ quản trị viên mới xem được thống kê!", ephemeral=True)
             return
 
-        game = CaroGame(interaction.user, self.bot.user, is_pvp=False)
-        bot_first = cfg("bot_goes_first")
-        if bot_first == "random":
-            bot_first = random.choice([True, False])
-        if bot_first:
-            game.current_turn = PLAYER_O
-            r, c = random.randint(0, cfg("board_size") - 1), random.randint(0, cfg("board_size") - 1)
-            game.place(r, c)
-        self.games[key] = game
+        def ms(histogram, q, **labels):
+            return f"{histogram.quantile(q, **labels) * 1000:.0f}"
+
+        games = self.games.stats()
+        searches = metrics.SEARCH_SECONDS.merged()[1]
+        rest_total = metrics.REST_REQUESTS.total()
+        tt_probes = metrics.TT_PROBES.total()
+        tt_rate = metrics.TT_HITS.total() / tt_probes if tt_probes else 0.0
+        embed = discord.Embed(title="📊 Thống kê Caro", color=discord.Color.blurple())
+        embed.add_field(name="Trận đấu", value=f"{games['active']} đang chơi / {games['games']} đang theo dõi")
+        embed.add_field(
+            name="Lệnh (p50/p95)",
+            value=f"{ms(metrics.COMMAND_SECONDS, 0.5)} / {ms(metrics.COMMAND_SECONDS, 0.95)} ms"
+        )
+        embed.add_field(
+            name="Nút bấm (p50/p95)",
+            value=f"{ms(metrics.INTERACTION_SECONDS, 0.5)} / {ms(metrics.INTERACTION_SECONDS, 0.95)} ms"
+        )
+        embed.add_field(
+            name="Engine",
+            value=f"{searches} lượt, {ms(metrics.SEARCH_SECONDS, 0.5)} / {ms(metrics.SEARCH_SECONDS, 0.95)} ms, "
+                  f"~{metrics.SEARCH_NODES.mean():.0f} nút, độ sâu {metrics.SEARCH_DEPTH.mean():.1f}\n"
+                  f"Ponder: {self.ponder.hits} trúng / {self.ponder.misses} trượt, "
+                  f"bảng chuyển vị: {tt_rate:.0%} trúng"
+        )
+        embed.add_field(
+            name="Discord API",
+            value=f"{rest_total} request, {metrics.REST_REQUESTS.total(status=429)} lần 429, "
+                  f"TB {metrics.REST_SECONDS.mean() * 1000:.0f} ms"
+        )
+        embed.add_field(
+            name="Event loop",
+            value=f"trễ p95 {ms(metrics.LOOP_LAG_SECONDS, 0.95)} ms, "
+                  f"tối đa {metrics.LOOP_LAG_MAX.values.get((), 0) * 1000:.0f} ms"
+        )
+        if self.ipc_server:
+            clusters = await ipc.broadcast(cfg("ipc_dir"), "stats")
+            if len(clusters) > 1:
+                embed.add_field(
+                    name="Cụm",
+                    value=f"{len(clusters)} tiến trình, {sum(c['guilds'] for c in clusters)} server, "
+                          f"{sum(c['active'] for c in clusters)} trận đang chơi, "
+                          f"{sum(c['rest_429'] for c in clusters)} lần 429"
+                )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @caro_group.command(name="leaderboard", description="Bảng xếp hạng người chơi")
+    async def caro_leaderboard(self, interaction: discord.Interaction):
+        try:
+            rows = await self.leaderboard()
+        except sqlite3.Error as e:
+            print(f"Match stats error: {e}")
+            await interaction.response.send_message("❌ Không đọc được bảng xếp hạng!", ephemeral=True)
+            return
 
-        board_view = BoardView(game, self, key)
-        embed = self.make_embed(game)
-        await interaction.response.send_message(embed=embed, view=board_view)
+        embed = discord.Embed(title="🏆 Bảng xếp hạng Caro", color=discord.Color.gold())
+        if rows:
+            embed.description = "\n".join(
+                f"**{i}.** <@{row.user_id}> — {row.wins} thắng / {row.losses} thua / {row.draws} hòa"
+                for i, row in enumerate(rows, 1)
+            )
+        else:
+            embed.description = "Chưa có trận đấu nào được ghi lại."
+        await interaction.response.send_message(embed=embed)
+
+    @caro_group.command(name="record", description="Xem thành tích thắng/thua")
+    @app_commands.describe(user="Người chơi muốn xem (mặc định là bạn)")
+    async def caro_record(self, interaction: discord.Interaction, user: discord.User = None):
+        user = user or interaction.user
+        try:
+            row = await asyncio.to_thread(self.match_stats.player, user.id)
+        except sqlite3.Error as e:
+            print(f"Match stats error: {e}")
+            await interaction.response.send_message("❌ Không đọc được thành tích!", ephemeral=True)
+            return
+
+        embed = discord.Embed(title=f"📈 Thành tích của {user.display_name}", color=discord.Color.blurple())
+        if row is None or not row.games:
+            embed.description = "Chưa có trận đấu nào được ghi lại."
+        else:
+            decided = row.wins + row.losses
+            rate = f"{row.wins * 100 / decided:.0f}%" if decided else "—"
+            embed.add_field(name="Trận", value=str(row.games))
+            embed.add_field(name="Thắng / Thua / Hòa", value=f"{row.wins} / {row.losses} / {row.draws}")
+            embed.add_field(name="Tỉ lệ thắng", value=rate)
+            embed.add_field(name="Bỏ dở", value=str(row.abandoned))
+            embed.add_field(name="Nước đi", value=str(row.moves))
+        await interaction.response.send_message(embed=embed)
 
     @caro_group.command(name="reset", description="Hủy trận đấu hiện tại")
     async def caro_reset(self, interaction: discord.Interaction):
-        key = interaction.channel_id
-        game = self.games.get(key)
-        if not game:
+        key, game = self.games.find(self.games.keys_by_channel(interaction.channel_id), lambda g: g.is_pvp)
+        if game is None:
+            key, game = self.find_bot_game(interaction.user.id)
+        if game is None:
             await interaction.response.send_message("Không có trận đấu nào!", ephemeral=True)
             return
 
         game_channel = game.game_channel
-        del self.games[key]
+        game.finished = True
+        self.matches.end(game, abandoned=True)
+        self.release_game(key)
+        self.stop_view(game)
+        self.games.pop(key)
 
         if game_channel and game_channel.id == interaction.channel_id:
             await interaction.response.send_message("Trận đấu đã bị hủy. Xóa phòng trong 5s...")
-            await asyncio.sleep(cfg("channel_reset_delay"))
-            try:
-                await game_channel.delete()
-            except discord.NotFound:
-                pass
+            self.scheduler.call_later(cfg("channel_reset_delay"), key, self.channels.release, game_channel)
         else:
             embed = discord.Embed(
                 title="Trận đấu đã bị hủy",
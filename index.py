@@ -1,47 +1,136 @@
 import discord
 import os
 import asyncio
+import hashlib
+import json
+import subprocess
+import sys
+import time
 from discord.ext import commands
 from dotenv import load_dotenv
 
+from caro import metrics
+
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
+FORCE_SYNC = os.getenv("FORCE_SYNC") == "1"
+SYNC_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".command_tree.json")
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or None
+SHARD_IDS = os.getenv("SHARD_IDS")
+SHARD_PROCESSES = int(os.getenv("SHARD_PROCESSES", "1"))
+CLUSTER = int(os.getenv("CARO_CLUSTER", "0"))
+IDENTIFY_DELAY = 5.5
 
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
 
-class MyBot(commands.Bot):
-    def __init__(self):
+class MyBot(commands.AutoShardedBot):
+    def __init__(self, shard_ids=None, shard_count=None):
         super().__init__(
             command_prefix="!",
             intents=intents,
-            help_command=None
+            help_command=None,
+            http_trace=metrics.http_trace(),
+            shard_ids=shard_ids,
+            shard_count=shard_count
         )
 
     async def setup_hook(self):
-        for filename in os.listdir('./cogs'):
-            if filename.endswith('.py'):
-                try:
-                    await self.load_extension(f'cogs.{filename[:-3]}')
-                    print(f"Loaded extension: {filename}")
-                except Exception as e:
-                    print(f"Failed to load {filename}: {e}")
+        started = time.perf_counter()
+        filenames = sorted(f for f in os.listdir('./cogs') if f.endswith('.py'))
+        await asyncio.gather(*(self.load_cog(filename) for filename in filenames))
+        print(f"Loaded {len(filenames)} extensions in {time.perf_counter() - started:.2f}s")
+        if CLUSTER == 0:
+            await self.sync_commands()
+
+    async def load_cog(self, filename):
+        started = time.perf_counter()
+        try:
+            await self.load_extension(f'cogs.{filename[:-3]}')
+            print(f"Loaded extension: {filename} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+        except Exception as e:
+            print(f"Failed to load {filename}: {e}")
+
+    def command_fingerprint(self):
+        payload = [command.to_dict(self.tree) for command in self.tree.get_commands()]
+        payload.sort(key=lambda command: (command.get("type", 1), command["name"]))
+        data = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
 
+    async def sync_commands(self):
+        fingerprint = self.command_fingerprint()
+        cached = {}
+        try:
+            with open(SYNC_CACHE_PATH, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            pass
+        if (not FORCE_SYNC and cached.get("application_id") == self.application_id
+                and cached.get("fingerprint") == fingerprint):
+            print("Command tree unchanged, skipping sync.")
+            return
         try:
             synced = await self.tree.sync()
             print(f"Synced {len(synced)} commands.")
         except Exception as e:
             print(f"Sync error: {e}")
+            return
+        try:
+            with open(SYNC_CACHE_PATH, "w", encoding="utf-8") as f:
+                json.dump({"application_id": self.application_id, "fingerprint": fingerprint}, f)
+        except OSError as e:
+            print(f"Sync cache error: {e}")
 
     async def on_ready(self):
-        print(f'Logged in as {self.user} (ID: {self.user.id})')
+        print(f'Logged in as {self.user} (ID: {self.user.id}), shards {sorted(self.shards)} of {self.shard_count}')
         print('------')
 
 
+def shard_ranges(shard_count, processes):
+    processes = max(1, min(processes, shard_count))
+    base, extra = divmod(shard_count, processes)
+    start = 0
+    ranges = []
+    for cluster in range(processes):
+        end = start + base + (1 if cluster < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def launch_clusters(shard_count, processes):
+    children = []
+    try:
+        for cluster, shard_ids in enumerate(shard_ranges(shard_count, processes)):
+            env = dict(
+                os.environ,
+                CARO_CLUSTER=str(cluster),
+                SHARD_COUNT=str(shard_count),
+                SHARD_IDS=",".join(map(str, shard_ids)),
+                SHARD_PROCESSES="1",
+            )
+            child = subprocess.Popen([sys.executable, os.path.abspath(__file__)], env=env)
+            children.append(child)
+            print(f"Started cluster {cluster} (pid {child.pid}) with shards {shard_ids}")
+            # Identifies share one rate limit bucket across processes.
+            time.sleep(IDENTIFY_DELAY * len(shard_ids))
+        for child in children:
+            child.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for child in children:
+            if child.poll() is None:
+                child.terminate()
+        for child in children:
+            child.wait()
+
+
 async def main():
-    bot = MyBot()
+    shard_ids = [int(i) for i in SHARD_IDS.split(",")] if SHARD_IDS else None
+    bot = MyBot(shard_ids, SHARD_COUNT)
     async with bot:
         await bot.start(TOKEN)
 
@@ -49,6 +138,8 @@ async def main():
 if __name__ == '__main__':
     if not TOKEN:
         print("Error: DISCORD_TOKEN not found in .env")
+    elif SHARD_COUNT and SHARD_PROCESSES > 1 and not SHARD_IDS:
+        launch_clusters(SHARD_COUNT, SHARD_PROCESSES)
     else:
         try:
             asyncio.run(main())